@@ -0,0 +1,116 @@
+# benchmarks/highlight_benchmark.py
+#
+# Compare /api/search highlighting latency on large documents across
+# index-time highlighting profiles (none / offsets / term_vectors) and
+# per-request modes (fast / quality / none).
+#
+#   python -m benchmarks.highlight_benchmark --docs 200 --doc-mb 2 --queries 50
+#
+# Creates (and afterwards deletes) throwaway indices "<prefix>-<profile>".
+# Highlight requests are built exactly as /api/search builds them, from the
+# profile read back from each index's live mapping, so a run also checks
+# that the cluster accepts every profile/mode combination.
+
+import argparse
+import random
+import statistics
+import time
+from datetime import datetime
+from opensearch_client.client import get_client
+from opensearch_client.indexer import OpenSearchIndexer, CONTENT_HIGHLIGHT_MAPPINGS, live_highlight_profile
+from routes.search_routes import build_highlight, HIGHLIGHT_MODES
+
+VOCABULARY = (
+    "patient diagnosis hypertension myocardial infarction chronic kidney disease "
+    "therapy dosage follow-up discharge summary radiology finding lesion biopsy "
+    "oncology cardiology medication allergy history examination laboratory result "
+    "pulmonary embolism thrombosis stroke diabetes insulin glucose pressure"
+).split()
+
+
+class _BenchIndexer(OpenSearchIndexer):
+    def __init__(self, client, index_name, profile):
+        self.profile = profile
+        super().__init__(client, index_name)
+
+    def _index_body(self, highlight_indexing=None):
+        return super()._index_body(self.profile)
+
+
+def generate_documents(count: int, doc_mb: float, seed: int = 42):
+    rng = random.Random(seed)
+    words_per_doc = int(doc_mb * 1024 * 1024 / 8)
+    for i in range(count):
+        content = " ".join(rng.choices(VOCABULARY, k=words_per_doc))
+        doc_id = f"bench-{i}"
+        yield doc_id, {
+            "path": doc_id,
+            "filename": f"report_{i}.txt",
+            "filetype": "txt",
+            "modified": datetime.now().strftime("%Y-%m-%dT%H:%M:%S"),
+            "size_bytes": len(content),
+            "content": content,
+        }
+
+
+def run_queries(client, index: str, profile: str, mode: str, queries: int):
+    rng = random.Random(7)
+    took, wall = [], []
+    for _ in range(queries):
+        body = {
+            "_source": {"excludes": ["content"]},
+            "query": {"match": {"content": {"query": rng.choice(VOCABULARY)}}},
+            "highlight": build_highlight(mode, profile),
+            "size": 20,
+        }
+        start = time.perf_counter()
+        res = client.search(index=index, body=body, request_cache=False)
+        wall.append((time.perf_counter() - start) * 1000)
+        took.append(res["took"])
+    return took, wall
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Highlighting latency benchmark")
+    parser.add_argument("--docs", type=int, default=200)
+    parser.add_argument("--doc-mb", type=float, default=2.0)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--prefix", default="bench-highlight")
+    parser.add_argument("--keep", action="store_true", help="keep the benchmark indices")
+    args = parser.parse_args()
+
+    client = get_client()
+    print(f"{args.docs} docs x {args.doc_mb} MB, {args.queries} queries per cell")
+    print(f"{'profile':<14}{'mode':<10}{'took p50':>10}{'took p95':>10}{'wall p50':>10}{'wall p95':>10}")
+
+    for profile in CONTENT_HIGHLIGHT_MAPPINGS:
+        index = f"{args.prefix}-{profile}"
+        if client.indices.exists(index=index):
+            client.indices.delete(index=index)
+        indexer = _BenchIndexer(client, index, profile)
+        indexer._bulk_index(generate_documents(args.docs, args.doc_mb))
+        client.indices.refresh(index=index)
+        live = live_highlight_profile(client, index)
+        if live != profile:
+            raise RuntimeError(f"{index}: live mapping reads as profile '{live}', expected '{profile}'")
+
+        for mode in HIGHLIGHT_MODES:
+            run_queries(client, index, profile, mode, 5)  # warm caches
+            took, wall = run_queries(client, index, profile, mode, args.queries)
+            print(
+                f"{profile:<14}{mode:<10}"
+                f"{statistics.median(took):>9.0f}ms{percentile(took, 0.95):>8.0f}ms"
+                f"{statistics.median(wall):>8.0f}ms{percentile(wall, 0.95):>8.0f}ms"
+            )
+
+        if not args.keep:
+            client.indices.delete(index=index)
+
+
+if __name__ == "__main__":
+    main()
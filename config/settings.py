@@ -15,6 +15,7 @@ load_dotenv(ENV_PATH)
 OPENSEARCH_HOST = os.getenv("OPENSEARCH_HOST", "localhost")
 OPENSEARCH_PORT = int(os.getenv("OPENSEARCH_PORT", 9200))
 OPENSEARCH_INDEX = os.getenv("OPENSEARCH_INDEX", "documents")
+OPENSEARCH_POOL_SIZE = int(os.getenv("OPENSEARCH_POOL_SIZE", 10))
 
 ENABLE_DATE_FILTER = os.getenv("ENABLE_DATE_FILTER", "true").lower() == "true"
 ENABLE_SIZE_FILTER = os.getenv("ENABLE_SIZE_FILTER", "true").lower() == "true"
@@ -24,3 +25,79 @@ MAX_RESULT_WINDOW = int(os.getenv("MAX_RESULT_WINDOW", 10000))
 DEFAULT_PAGE_SIZE = int(os.getenv("DEFAULT_PAGE_SIZE", 20))
 
 ENABLE_AI_EXPANSION = os.getenv("ENABLE_AI_EXPANSION", "false").lower() == "true"
+
+# Bulk indexing / backpressure
+BULK_INITIAL_DOCS = int(os.getenv("BULK_INITIAL_DOCS", 50))
+BULK_MIN_DOCS = int(os.getenv("BULK_MIN_DOCS", 5))
+BULK_MAX_DOCS = int(os.getenv("BULK_MAX_DOCS", 500))
+BULK_MAX_BYTES = int(os.getenv("BULK_MAX_BYTES", 10 * 1024 * 1024))
+BULK_MAX_CONCURRENCY = int(os.getenv("BULK_MAX_CONCURRENCY", 4))
+BULK_TARGET_LATENCY_MS = int(os.getenv("BULK_TARGET_LATENCY_MS", 2000))
+BULK_MAX_RETRIES = int(os.getenv("BULK_MAX_RETRIES", 6))
+BULK_BACKOFF_BASE_MS = int(os.getenv("BULK_BACKOFF_BASE_MS", 200))
+BULK_BACKOFF_CAP_MS = int(os.getenv("BULK_BACKOFF_CAP_MS", 30000))
+
+# Crash-safe progress journal for index_folder runs
+INDEX_JOURNAL_PATH = os.getenv("INDEX_JOURNAL_PATH", str(BASE_DIR / "data" / "index_journal.sqlite3"))
+
+# Archive (.zip / .tar*) members are streamed into the extractors; limits guard against archive bombs
+ARCHIVE_MAX_MEMBERS = int(os.getenv("ARCHIVE_MAX_MEMBERS", 10000))
+ARCHIVE_MAX_TOTAL_BYTES = int(os.getenv("ARCHIVE_MAX_TOTAL_BYTES", 4 * 1024 * 1024 * 1024))
+ARCHIVE_MAX_MEMBER_BYTES = int(os.getenv("ARCHIVE_MAX_MEMBER_BYTES", 256 * 1024 * 1024))
+ARCHIVE_MAX_DEPTH = int(os.getenv("ARCHIVE_MAX_DEPTH", 2))
+
+# Startup warm-up; /ready reports 503 until it has completed
+ENABLE_WARMUP = os.getenv("ENABLE_WARMUP", "true").lower() == "true"
+WARMUP_QUERIES_FILE = os.getenv("WARMUP_QUERIES_FILE", str(BASE_DIR / "config" / "warmup_queries.json"))
+WARMUP_RETRY_SECONDS = int(os.getenv("WARMUP_RETRY_SECONDS", 5))
+
+# On-demand request profiling ("X-Profile: 1|sample|trace" header, or random sampling)
+PROFILE_ALLOW_HEADER = os.getenv("PROFILE_ALLOW_HEADER", "true").lower() == "true"
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", 0.0))
+PROFILE_MODE = os.getenv("PROFILE_MODE", "sample")  # sample | trace
+PROFILE_SAMPLE_INTERVAL_MS = int(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", 5))
+PROFILE_MAX_PER_MINUTE = int(os.getenv("PROFILE_MAX_PER_MINUTE", 10))
+PROFILE_DIR = os.getenv("PROFILE_DIR", str(BASE_DIR / "data" / "profiles"))
+
+# Precompiled synonyms (utils/synonym_builder.py) applied by the content search analyzer.
+# SYNONYMS_PATH is resolved by OpenSearch relative to its config directory on each node.
+ENABLE_SYNONYM_ANALYZER = os.getenv("ENABLE_SYNONYM_ANALYZER", "false").lower() == "true"
+SYNONYMS_PATH = os.getenv("SYNONYMS_PATH", "analysis/medical_synonyms.txt")
+SYNONYM_VOCABULARY_FILE = os.getenv("SYNONYM_VOCABULARY_FILE", str(BASE_DIR / "config" / "medical_terms.txt"))
+SYNONYMS_OUTPUT_FILE = os.getenv("SYNONYMS_OUTPUT_FILE", str(BASE_DIR / "data" / "medical_synonyms.txt"))
+
+# Distributed indexing: durable work queue shared by the API (coordinator) and utils/index_worker.py
+# The SQLite file must stay on the coordinator's local disk; workers on other hosts set
+# WORK_QUEUE_URL to the coordinator API (e.g. http://indexer-api:8000/api) instead
+WORK_QUEUE_PATH = os.getenv("WORK_QUEUE_PATH", str(BASE_DIR / "data" / "work_queue.sqlite3"))
+WORK_QUEUE_URL = os.getenv("WORK_QUEUE_URL", "")
+WORKER_BATCH_SIZE = int(os.getenv("WORKER_BATCH_SIZE", 20))
+WORKER_LEASE_SECONDS = int(os.getenv("WORKER_LEASE_SECONDS", 600))
+WORKER_MAX_ATTEMPTS = int(os.getenv("WORKER_MAX_ATTEMPTS", 3))
+WORKER_POLL_SECONDS = float(os.getenv("WORKER_POLL_SECONDS", 2))
+
+# Content highlighting. CONTENT_HIGHLIGHT_INDEXING decides what is stored at index time
+# (new indices only): offsets (postings, unified highlighter) | term_vectors (fvh) | none
+CONTENT_HIGHLIGHT_INDEXING = os.getenv("CONTENT_HIGHLIGHT_INDEXING", "offsets")
+DEFAULT_HIGHLIGHT_MODE = os.getenv("DEFAULT_HIGHLIGHT_MODE", "fast")  # fast | quality | none
+# Cap on characters re-analyzed per hit when the index has no stored offsets
+HIGHLIGHT_MAX_ANALYZER_OFFSET = int(os.getenv("HIGHLIGHT_MAX_ANALYZER_OFFSET", 1000000))
+
+# Optional vector path: embeddings computed at index time into a k-NN field, used by search_mode "hybrid"
+ENABLE_VECTOR_SEARCH = os.getenv("ENABLE_VECTOR_SEARCH", "false").lower() == "true"
+EMBEDDER = os.getenv("EMBEDDER", "hashing")  # hashing | sentence-transformers:<model name>
+EMBEDDING_DIMENSION = int(os.getenv("EMBEDDING_DIMENSION", 384))  # hashing embedder only
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", 32))
+EMBEDDING_MAX_CHARS = int(os.getenv("EMBEDDING_MAX_CHARS", 20000))
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", 10000))
+HYBRID_RRF_K = int(os.getenv("HYBRID_RRF_K", 60))
+
+# PDF extraction: large PDFs are split into page ranges extracted in parallel processes
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", 200))
+PDF_PAGES_PER_CHUNK = int(os.getenv("PDF_PAGES_PER_CHUNK", 50))
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", os.cpu_count() or 1))
+PDF_MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", 0))  # 0 = index every page
+
+# Partitioned indices behind the OPENSEARCH_INDEX alias: none | year (of modified) | folder (crawl root)
+PARTITION_SCHEME = os.getenv("PARTITION_SCHEME", "none").lower()
+PARTITION_CACHE_SECONDS = int(os.getenv("PARTITION_CACHE_SECONDS", 60))
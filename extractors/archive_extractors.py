@@ -0,0 +1,181 @@
+import io
+import lzma
+import tarfile
+import zipfile
+import zlib
+from datetime import datetime
+from pathlib import Path, PurePosixPath
+from typing import Iterator, NamedTuple, Optional
+from extractors.file_extractors import EXTRACTORS, Source
+from config.settings import (
+    ARCHIVE_MAX_MEMBERS,
+    ARCHIVE_MAX_TOTAL_BYTES,
+    ARCHIVE_MAX_MEMBER_BYTES,
+    ARCHIVE_MAX_DEPTH,
+)
+
+ARCHIVE_SUFFIXES = (".tar.gz", ".tgz", ".tar.bz2", ".tbz2", ".tar.xz", ".txz", ".tar", ".zip")
+
+CHUNK_SIZE = 1024 * 1024
+
+# Errors that spoil a single member (encrypted, unsupported compression,
+# corrupt stream) - the member is skipped, the rest of the archive is kept
+MEMBER_ERRORS = (
+    RuntimeError,
+    NotImplementedError,
+    zlib.error,
+    lzma.LZMAError,
+    zipfile.BadZipFile,
+    tarfile.TarError,
+    EOFError,
+    OSError,
+)
+
+
+class ArchiveLimitExceeded(Exception):
+    pass
+
+
+class ArchiveMember(NamedTuple):
+    inner_path: str           # "dir/file.pdf", or "inner.zip!/file.pdf" for nested archives
+    data: bytes
+    modified: Optional[datetime]
+
+
+def archive_suffix(name: str) -> Optional[str]:
+    name = name.lower()
+    for suffix in ARCHIVE_SUFFIXES:
+        if name.endswith(suffix):
+            return suffix
+    return None
+
+
+class _Budget:
+    """
+    Limits shared by one top-level archive and everything nested inside it.
+    Byte counts are taken from the bytes actually decompressed, not from
+    the (forgeable) sizes declared in archive headers.
+    """
+
+    def __init__(self):
+        self.members = 0
+        self.bytes = 0
+
+    def add_member(self):
+        self.members += 1
+        if self.members > ARCHIVE_MAX_MEMBERS:
+            raise ArchiveLimitExceeded(f"more than {ARCHIVE_MAX_MEMBERS} members")
+
+    def read(self, stream) -> bytes:
+        limit = min(ARCHIVE_MAX_MEMBER_BYTES, ARCHIVE_MAX_TOTAL_BYTES - self.bytes)
+        buf = io.BytesIO()
+        while True:
+            chunk = stream.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            buf.write(chunk)
+            self.bytes += len(chunk)
+            if buf.tell() > limit:
+                raise ArchiveLimitExceeded(
+                    f"uncompressed size exceeds limit "
+                    f"({ARCHIVE_MAX_MEMBER_BYTES} per member, {ARCHIVE_MAX_TOTAL_BYTES} per archive)"
+                )
+        return buf.getvalue()
+
+
+def _timestamp(make) -> Optional[datetime]:
+    # Zeroed DOS dates / out-of-range tar mtimes -> None; the indexer then
+    # uses the archive's own mtime
+    try:
+        return make()
+    except (ValueError, OverflowError, OSError):
+        return None
+
+
+def _wanted(name: str) -> bool:
+    return bool(archive_suffix(name)) or PurePosixPath(name).suffix.lower() in EXTRACTORS
+
+
+def _iter_zip(source: Source, budget: _Budget):
+    with zipfile.ZipFile(source) as zf:
+        for info in zf.infolist():
+            if info.is_dir():
+                continue
+            budget.add_member()
+            if not _wanted(info.filename):
+                continue
+            try:
+                with zf.open(info) as f:
+                    data = budget.read(f)
+            except MEMBER_ERRORS as e:
+                print(f"Skipping archive member {info.filename}: {e}")
+                continue
+            yield info.filename, data, _timestamp(lambda: datetime(*info.date_time))
+
+
+def _iter_tar(source: Source, budget: _Budget):
+    # Stream mode: members are read sequentially, no seeking back into the archive
+    if isinstance(source, Path):
+        tf = tarfile.open(source, mode="r|*")
+    else:
+        tf = tarfile.open(fileobj=source, mode="r|*")
+    with tf:
+        for member in tf:
+            if not member.isfile():
+                continue
+            budget.add_member()
+            if not _wanted(member.name):
+                continue
+            try:
+                f = tf.extractfile(member)
+                if f is None:
+                    continue
+                data = budget.read(f)
+            except MEMBER_ERRORS as e:
+                # A corrupt compressed tar stream usually fails the next
+                # header read too; that is handled at archive level
+                print(f"Skipping archive member {member.name}: {e}")
+                continue
+            yield member.name, data, _timestamp(lambda: datetime.fromtimestamp(member.mtime))
+
+
+def _iter_archive(source: Source, suffix: str, budget: _Budget, depth: int):
+    members = _iter_zip(source, budget) if suffix == ".zip" else _iter_tar(source, budget)
+
+    for name, data, modified in members:
+        name = name.lstrip("/")
+        nested = archive_suffix(name)
+        if not nested:
+            yield ArchiveMember(name, data, modified)
+            continue
+        if depth + 1 > ARCHIVE_MAX_DEPTH:
+            print(f"Skipping nested archive {name}: depth limit {ARCHIVE_MAX_DEPTH} reached")
+            continue
+        try:
+            for member in _iter_archive(io.BytesIO(data), nested, budget, depth + 1):
+                yield member._replace(inner_path=f"{name}!/{member.inner_path}")
+        except ArchiveLimitExceeded:
+            raise
+        except Exception as e:
+            print(f"Skipping rest of nested archive {name}: {e}")
+
+
+def iter_archive_members(source: Source, name: str) -> Iterator[ArchiveMember]:
+    """
+    Stream indexable members of a zip/tar archive (recursing into nested
+    archives), one member in memory at a time.
+
+    Stops with a log line if the archive exceeds ARCHIVE_MAX_MEMBERS,
+    ARCHIVE_MAX_TOTAL_BYTES or ARCHIVE_MAX_MEMBER_BYTES; members yielded
+    before that point are kept.
+    """
+    suffix = archive_suffix(name)
+    if not suffix:
+        return
+    try:
+        yield from _iter_archive(source, suffix, _Budget(), depth=0)
+    except ArchiveLimitExceeded as e:
+        print(f"Archive {name} truncated: {e}")
+    except Exception as e:
+        # Never let one bad archive abort the whole indexing run
+        print(f"Archive {name} unreadable: {e}")
@@ -1,20 +1,27 @@
 from pathlib import Path
-from typing import Optional
-import fitz
+from typing import BinaryIO, Optional, Union
+import io
 from docx import Document
 from zipfile import BadZipFile
 import csv
 import openpyxl
 import xlrd
 from pptx import Presentation
+from extractors.pdf_pages import extract_pdf_text
 
-def extract_txt(path: Path) -> Optional[str]:
+# Extractors accept a filesystem path or a seekable binary stream
+# (archive members are handed over as in-memory streams, never unpacked to disk)
+Source = Union[Path, BinaryIO]
+
+def extract_txt(path: Source) -> Optional[str]:
     try:
+        if not isinstance(path, Path):
+            return path.read().decode("utf-8", errors="ignore")
         return path.read_text(encoding="utf-8", errors="ignore")
     except Exception:
         return None
 
-def extract_docx(path: Path) -> Optional[str]:
+def extract_docx(path: Source) -> Optional[str]:
     try:
         doc = Document(path)
         return "\n".join(p.text for p in doc.paragraphs if p.text)
@@ -23,20 +30,23 @@ def extract_docx(path: Path) -> Optional[str]:
     except Exception:
         return None
 
-def extract_pdf(path: Path) -> Optional[str]:
+def extract_pdf(path: Source) -> Optional[str]:
     try:
-        text = []
-        with fitz.open(path) as pdf:
-            for page in pdf:
-                text.append(page.get_text("text"))
-        return "\n".join(text)
-    except Exception:
+        if isinstance(path, Path):
+            return extract_pdf_text(path, path.name)
+        return extract_pdf_text(path.read(), getattr(path, "name", "<stream>"))
+    except Exception as e:
+        print(f"PDF extraction failed for {getattr(path, 'name', '<stream>')}: {e}")
         return None
 
-def extract_csv(path: Path) -> Optional[str]:
+def extract_csv(path: Source) -> Optional[str]:
     try:
         rows = []
-        with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        if isinstance(path, Path):
+            f = open(path, "r", encoding="utf-8", errors="ignore")
+        else:
+            f = io.TextIOWrapper(path, encoding="utf-8", errors="ignore", newline="")
+        with f:
             reader = csv.reader(f)
             for row in reader:
                 rows.append(" ".join(row))
@@ -44,7 +54,7 @@ def extract_csv(path: Path) -> Optional[str]:
     except Exception:
         return None
 
-def extract_xlsx(path: Path) -> Optional[str]:
+def extract_xlsx(path: Source) -> Optional[str]:
     try:
         wb = openpyxl.load_workbook(path, data_only=True)
         text = []
@@ -56,9 +66,12 @@ def extract_xlsx(path: Path) -> Optional[str]:
     except Exception:
         return None
 
-def extract_xls(path: Path) -> Optional[str]:
+def extract_xls(path: Source) -> Optional[str]:
     try:
-        wb = xlrd.open_workbook(path)
+        if isinstance(path, Path):
+            wb = xlrd.open_workbook(path)
+        else:
+            wb = xlrd.open_workbook(file_contents=path.read())
         text = []
         for sheet in wb.sheets():
             for r in range(sheet.nrows):
@@ -69,7 +82,7 @@ def extract_xls(path: Path) -> Optional[str]:
     except Exception:
         return None
 
-def extract_pptx(path: Path) -> Optional[str]:
+def extract_pptx(path: Source) -> Optional[str]:
     try:
         prs = Presentation(path)
         text = []
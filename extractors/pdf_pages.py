@@ -0,0 +1,142 @@
+import multiprocessing
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Iterator, NamedTuple, Union
+import fitz
+from config.settings import (
+    PDF_PARALLEL_MIN_PAGES,
+    PDF_PAGES_PER_CHUNK,
+    PDF_WORKERS,
+    PDF_MAX_PAGES,
+)
+
+
+class PageText(NamedTuple):
+    page: int        # 0-based
+    text: str
+    seconds: float
+
+
+# Per-document extraction stats for the most recent PDFs (exposed by /api/index-status)
+pdf_stats = deque(maxlen=50)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn, not fork: the API process runs bulk/threadpool threads
+            _pool = ProcessPoolExecutor(
+                max_workers=PDF_WORKERS, mp_context=multiprocessing.get_context("spawn")
+            )
+        return _pool
+
+
+def _discard_pool(pool: ProcessPoolExecutor):
+    # A worker died (MuPDF crash, OOM kill): the executor is unusable from
+    # then on, so drop it and let the next _get_pool() start a fresh one
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _open(source: Union[str, bytes]):
+    if isinstance(source, bytes):
+        return fitz.open(stream=source, filetype="pdf")
+    return fitz.open(source)
+
+
+def _extract_range(source: Union[str, bytes], start: int, end: int) -> list[PageText]:
+    # Runs in a worker process; each range opens its own document handle
+    pages = []
+    with _open(source) as pdf:
+        for n in range(start, end):
+            t0 = time.perf_counter()
+            text = pdf[n].get_text("text")
+            pages.append(PageText(n, text, time.perf_counter() - t0))
+    return pages
+
+
+def iter_pdf_pages(source: Union[str, bytes], page_count: int = None) -> Iterator[PageText]:
+    """
+    Yield page texts in page order, up to PDF_MAX_PAGES.
+
+    Documents on disk with at least PDF_PARALLEL_MIN_PAGES pages are split
+    into PDF_PAGES_PER_CHUNK-page ranges extracted concurrently in a process
+    pool; ranges are yielded as soon as they and all earlier ranges are done.
+
+    In-memory documents (archive members) are extracted in-process: every
+    submitted range would pickle the whole PDF through the pool's pipes again.
+    """
+    if page_count is None:
+        with _open(source) as pdf:
+            page_count = pdf.page_count
+    pages = min(page_count, PDF_MAX_PAGES) if PDF_MAX_PAGES else page_count
+
+    if isinstance(source, bytes) or pages < PDF_PARALLEL_MIN_PAGES or PDF_WORKERS <= 1:
+        yield from _extract_range(source, 0, pages)
+        return
+
+    ranges = [
+        (start, min(start + PDF_PAGES_PER_CHUNK, pages))
+        for start in range(0, pages, PDF_PAGES_PER_CHUNK)
+    ]
+    done = 0
+    # One retry of the unfinished ranges on a fresh pool; a document that
+    # breaks that one too is most likely what crashes the workers
+    for attempt in range(2):
+        pool = _get_pool()
+        futures = []
+        try:
+            futures = [pool.submit(_extract_range, source, start, end) for start, end in ranges[done:]]
+            for future in futures:
+                chunk = future.result()
+                done += 1
+                yield from chunk
+            return
+        except BrokenProcessPool as e:
+            _discard_pool(pool)
+            print(f"PDF worker pool broke at pages {ranges[done][0] + 1}-{ranges[done][1]}: {e}")
+            if attempt:
+                raise
+        finally:
+            for future in futures:
+                future.cancel()
+
+
+def extract_pdf_text(source: Union[Path, bytes], name: str) -> str:
+    if isinstance(source, Path):
+        source = str(source)
+
+    start = time.perf_counter()
+    with _open(source) as pdf:
+        total = pdf.page_count
+
+    texts = []
+    page_times = []
+    for page in iter_pdf_pages(source, total):
+        texts.append(page.text)
+        page_times.append(page)
+
+    slowest = sorted(page_times, key=lambda p: p.seconds, reverse=True)[:5]
+    pdf_stats.append({
+        "source": name,
+        "pages_total": total,
+        "pages_indexed": len(texts),
+        "chars": sum(len(t) for t in texts),
+        "seconds": round(time.perf_counter() - start, 3),
+        "slowest_pages": [
+            {"page": p.page + 1, "ms": round(p.seconds * 1000, 1), "chars": len(p.text)}
+            for p in slowest
+        ],
+    })
+    return "\n".join(texts)
@@ -1,21 +1,37 @@
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse
 from routes.indexing_routes import router as indexing_router
 from routes.search_routes import router as search_router
 from config.settings import OPENSEARCH_INDEX
+from utils.response import success_response, failure_response
+from utils.profiler import ProfilingMiddleware
+from utils.warmup import readiness, start_warmup
 
 app = FastAPI(title="OpenSearch File Search API")
+app.add_middleware(ProfilingMiddleware)
 
 app.include_router(indexing_router, prefix="/api")
 app.include_router(search_router, prefix="/api")
 
+@app.on_event("startup")
+def warmup():
+    start_warmup()
+
 @app.get("/")
 def root():
     return {
         "status": "success",
         "message": "API running",
-        "endpoints": ["/api/index-folder", "/api/search"]
+        "endpoints": ["/api/index-folder", "/api/index-jobs/{job_id}", "/api/work-queue/claim", "/api/work-queue/renew", "/api/work-queue/complete", "/api/work-queue/fail", "/api/index-status", "/api/search", "/api/search-stats", "/ready"]
     }
 
+@app.get("/ready")
+def ready():
+    # Load balancer readiness probe: 503 until warm-up has completed
+    if readiness["ready"]:
+        return success_response("Ready", dict(readiness))
+    return JSONResponse(status_code=503, content=failure_response("Warming up", dict(readiness)))
+
 print("Loaded index:", OPENSEARCH_INDEX)
 
 
@@ -25,4 +41,4 @@ print("Loaded index:", OPENSEARCH_INDEX)
 # add bin\opensearch.bat
 
 # then run:
-# uvicorn main:app --reload
\ No newline at end of file
+# uvicorn main:app --reload
@@ -1,4 +1,27 @@
 from pydantic import BaseModel
+from typing import List
 
 class FolderInput(BaseModel):
     folder: str
+    resume: bool = True  # continue an interrupted run on the same folder
+    distributed: bool = False  # enqueue files for utils/index_worker.py instead of indexing in-process
+
+# Work queue calls from utils/index_worker.py on other hosts (utils/work_queue.RemoteWorkQueue)
+class ClaimInput(BaseModel):
+    owner: str
+    limit: int
+
+class RenewInput(BaseModel):
+    owner: str
+    task_ids: List[int]
+
+class CompleteInput(BaseModel):
+    owner: str
+    job_id: str
+    task_ids: List[int]
+    docs_indexed: int
+
+class FailInput(BaseModel):
+    owner: str
+    task_ids: List[int]
+    error: str
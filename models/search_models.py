@@ -3,11 +3,13 @@ from typing import List, Optional
 
 class SearchInput(BaseModel):
     keyword: str
-    search_mode: str  # filename or content
+    search_mode: str  # filename, content or hybrid (content + vector)
     file_types: Optional[List[str]] = None
     date_from: Optional[str] = None
     date_to: Optional[str] = None
     size_from: Optional[int] = None  # KB
     size_to: Optional[int] = None    # KB
+    folders: Optional[List[str]] = None  # only files under these folders
     from_: Optional[int] = 0
     size: Optional[int] = 20
+    highlight: Optional[str] = None  # fast, quality or none (default: DEFAULT_HIGHLIGHT_MODE)
@@ -1,11 +1,24 @@
+import threading
 from opensearchpy import OpenSearch
-from config.settings import OPENSEARCH_HOST, OPENSEARCH_PORT
+from config.settings import OPENSEARCH_HOST, OPENSEARCH_PORT, OPENSEARCH_POOL_SIZE
+
+_client = None
+_client_lock = threading.Lock()
 
 def get_client():
-    return OpenSearch(
-        hosts=[{"host": OPENSEARCH_HOST, "port": OPENSEARCH_PORT}],
-        http_auth=("admin", "Opensearch@132"),
-        use_ssl=True,
-        verify_certs=False,
-        ssl_show_warn=False,
-    )
+    """
+    Process-wide client. Connections (and their TLS sessions) are pooled
+    and reused across requests instead of being rebuilt per call.
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = OpenSearch(
+                hosts=[{"host": OPENSEARCH_HOST, "port": OPENSEARCH_PORT}],
+                http_auth=("admin", "Opensearch@132"),
+                use_ssl=True,
+                verify_certs=False,
+                ssl_show_warn=False,
+                pool_maxsize=OPENSEARCH_POOL_SIZE,
+            )
+        return _client
@@ -0,0 +1,41 @@
+from config.settings import HYBRID_RRF_K
+
+
+def reciprocal_rank_fusion(result_lists, k: int = HYBRID_RRF_K):
+    """
+    Fuse ranked hit lists: score(doc) = sum over lists of 1 / (k + rank).
+    Rank-based, so BM25 and cosine scores need no normalisation.
+    The first list's copy of a hit wins (it carries the highlights).
+    """
+    fused = {}
+    scores = {}
+    for hits in result_lists:
+        for rank, hit in enumerate(hits, 1):
+            key = (hit["_index"], hit["_id"])
+            fused.setdefault(key, hit)
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
+
+    ranked = sorted(fused, key=lambda key: scores[key], reverse=True)
+    return [{**fused[key], "_score": scores[key]} for key in ranked]
+
+
+def hybrid_search(client, index: str, lexical_body: dict, vector_body: dict, from_: int, size: int) -> dict:
+    """
+    Run the BM25 and k-NN queries in one msearch round trip, each fetching
+    the top from_ + size hits, fuse with RRF and page the fused list.
+    Returns a search-response-shaped dict.
+    """
+    window = from_ + size
+    lexical_body = {**lexical_body, "from": 0, "size": window}
+    vector_body = {**vector_body, "from": 0, "size": window}
+
+    res = client.msearch(body=[{"index": index}, lexical_body, {"index": index}, vector_body])
+
+    hit_lists = []
+    for response in res["responses"]:
+        if "error" in response:
+            raise RuntimeError(response["error"])
+        hit_lists.append(response["hits"]["hits"])
+
+    fused = reciprocal_rank_fusion(hit_lists)
+    return {"hits": {"hits": fused[from_:window]}}
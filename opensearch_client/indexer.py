@@ -1,63 +1,531 @@
+import io
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 from pathlib import Path
 from datetime import datetime
 from extractors.file_extractors import EXTRACTORS
+from extractors.archive_extractors import archive_suffix, iter_archive_members
+from opensearchpy.exceptions import NotFoundError, RequestError
+from opensearch_client.partitions import is_partitioned, partition_for, invalidate_mappings, live_mappings
+from opensearch_client.throttle import bulk_controller, backoff_delay, is_retryable, RETRYABLE_STATUS
+from config.settings import (
+    BULK_MAX_BYTES,
+    BULK_MAX_CONCURRENCY,
+    BULK_MAX_RETRIES,
+    ENABLE_SYNONYM_ANALYZER,
+    SYNONYMS_PATH,
+    CONTENT_HIGHLIGHT_INDEXING,
+    ENABLE_VECTOR_SEARCH,
+)
+from utils.embedder import embed_texts, get_embedder
+
+# Serializes index creation between the bulk threads of this process
+_ensure_lock = threading.Lock()
+
+# Extra content mapping per highlighting profile; stored offsets / term vectors
+# let the highlighter skip re-analyzing multi-megabyte content per hit
+CONTENT_HIGHLIGHT_MAPPINGS = {
+    "offsets": {"index_options": "offsets"},
+    "term_vectors": {"term_vector": "with_positions_offsets"},
+    "none": {},
+}
+
+def live_highlight_profile(client, index: str) -> str:
+    """
+    Highlighting profile the content field was actually built with, read
+    from the live mapping rather than the current setting. When the index
+    expression covers several indices the weakest profile wins, so the
+    highlighter only relies on what every one of them stores.
+    """
+    mappings = live_mappings(client, index)
+    profiles = set()
+    for mapping in mappings.values():
+        content = mapping.get("properties", {}).get("content", {})
+        if content.get("term_vector") == CONTENT_HIGHLIGHT_MAPPINGS["term_vectors"]["term_vector"]:
+            profiles.add("term_vectors")
+        elif content.get("index_options") == "offsets":
+            profiles.add("offsets")
+        else:
+            profiles.add("none")
+
+    if not profiles or "none" in profiles:
+        return "none"
+    if profiles == {"term_vectors"}:
+        return "term_vectors"
+    # unified reads postings offsets or term vectors, whichever a field has
+    return "offsets"
+
+def live_synonym_search(client, index: str) -> bool:
+    """
+    True when every index behind the expression searches content through the
+    synonym_search analyzer; indices created before ENABLE_SYNONYM_ANALYZER
+    was turned on keep their old search analyzer.
+    """
+    mappings = live_mappings(client, index)
+    return bool(mappings) and all(
+        mapping.get("properties", {}).get("content", {}).get("search_analyzer") == "synonym_search"
+        for mapping in mappings.values()
+    )
+
+def live_knn_vector(client, index: str) -> bool:
+    """
+    True when every index behind the expression maps content_vector as a
+    knn_vector; indices created before ENABLE_VECTOR_SEARCH was turned on
+    have no such field.
+    """
+    mappings = live_mappings(client, index)
+    return bool(mappings) and all(
+        mapping.get("properties", {}).get("content_vector", {}).get("type") == "knn_vector"
+        for mapping in mappings.values()
+    )
+
+def is_indexable(file: Path) -> bool:
+    return bool(archive_suffix(file.name)) or file.suffix.lower() in EXTRACTORS
 
 class OpenSearchIndexer:
-    def __init__(self, client, index_name):
+    def __init__(self, client, index_name, journal=None):
         self.client = client
         self.index_name = index_name
+        self.journal = journal
+        self._source_folder = None
+        self._run_id = None
+        self._stats_lock = threading.Lock()
+        # Indices checked/created during the current run; cleared when the
+        # next run starts, so an index deleted in between is recreated with
+        # the full mapping instead of being auto-created by bulk
+        self._ensured = set()
+        self._reset_run_stats()
+        self._ensure_index()
+
+    def _start_run(self, source_folder):
+        self._source_folder = source_folder
+        self._reset_run_stats()
+        with _ensure_lock:
+            self._ensured.clear()
         self._ensure_index()
 
     def _ensure_index(self):
-        if self.client.indices.exists(index=self.index_name):
+        if self.index_name in self._ensured:
             return
-        self.client.indices.create(
-            index=self.index_name,
-            body={
-                "settings": {
-                    "analysis": {
-                        "tokenizer": {"edge_ngram_tokenizer": {"type": "edge_ngram","min_gram": 2,"max_gram": 20,"token_chars": ["letter", "digit"]}},
-                        "analyzer": {"prefix_analyzer": {"type": "custom","tokenizer": "edge_ngram_tokenizer","filter": ["lowercase"]},
-                        "standard_lowercase": {"type": "custom","tokenizer": "standard","filter": ["lowercase"]}}}},
-                "mappings": {
-                    "properties": {
-                        "path": {"type": "keyword"},
-                        "filename": {"type": "text","analyzer": "prefix_analyzer","search_analyzer": "standard_lowercase"},
-                        "filetype": {"type": "keyword"},
-                        "modified": {"type": "date"},
-                        "size_bytes": {"type": "long"},
-                        "content": {"type": "text","analyzer": "prefix_analyzer","search_analyzer": "standard_lowercase"}
-                    }
+        with _ensure_lock:
+            if self.index_name in self._ensured:
+                return
+            if is_partitioned():
+                # index_name is the alias over the partitions, which are created lazily
+                if self.client.indices.exists(index=self.index_name) and not self.client.indices.exists_alias(name=self.index_name):
+                    raise RuntimeError(
+                        f"{self.index_name} is a concrete index; partitioning needs it free to use as an alias"
+                    )
+            elif not self.client.indices.exists(index=self.index_name):
+                self._create_index(self.index_name)
+            self._ensured.add(self.index_name)
+
+    def _ensure_partition(self, index, meta):
+        if index in self._ensured:
+            return
+        with _ensure_lock:
+            if index in self._ensured:
+                return
+            if not self.client.indices.exists(index=index):
+                self._create_index(index, meta)
+            self._ensured.add(index)
+
+    def _create_index(self, index, partition_meta=None):
+        body = self._index_body()
+        if partition_meta is not None:
+            body["aliases"] = {self.index_name: {}}
+            body["mappings"]["_meta"] = {"partition": partition_meta}
+        try:
+            self.client.indices.create(index=index, body=body)
+        except RequestError as e:
+            # Another worker created it first
+            if e.error != "resource_already_exists_exception":
+                raise
+        invalidate_mappings(index, self.index_name)
+
+    def _target_index(self, source):
+        if not is_partitioned():
+            self._ensure_index()
+            return self.index_name
+        index, meta = partition_for(self.index_name, source, self._source_folder)
+        self._ensure_partition(index, meta)
+        return index
+
+    def verify_mapping(self):
+        """
+        Return the fields whose live mapping type differs from the expected one
+        (an empty list means the index matches).
+        """
+        expected = self._index_body()["mappings"]["properties"]
+        try:
+            live = self.client.indices.get_mapping(index=self.index_name)
+        except NotFoundError:
+            # Partitioned and nothing indexed yet
+            return []
+        mismatched = []
+        for mapping in live.values():
+            props = mapping.get("mappings", {}).get("properties", {})
+            for field, spec in expected.items():
+                if props.get(field, {}).get("type") != spec["type"]:
+                    mismatched.append(field)
+        return sorted(set(mismatched))
+
+    def _index_body(self, highlight_indexing=CONTENT_HIGHLIGHT_INDEXING):
+        body = {
+            "settings": {
+                "analysis": {
+                    "tokenizer": {"edge_ngram_tokenizer": {"type": "edge_ngram","min_gram": 2,"max_gram": 20,"token_chars": ["letter", "digit"]}},
+                    "analyzer": {"prefix_analyzer": {"type": "custom","tokenizer": "edge_ngram_tokenizer","filter": ["lowercase"]},
+                    "standard_lowercase": {"type": "custom","tokenizer": "standard","filter": ["lowercase"]}}}},
+            "mappings": {
+                "properties": {
+                    "path": {"type": "keyword"},
+                    "filename": {"type": "text","analyzer": "prefix_analyzer","search_analyzer": "standard_lowercase"},
+                    "filetype": {"type": "keyword"},
+                    "modified": {"type": "date"},
+                    "size_bytes": {"type": "long"},
+                    "content": {"type": "text","analyzer": "prefix_analyzer","search_analyzer": "standard_lowercase"}
                 }
             }
-        )
+        }
+
+        body["mappings"]["properties"]["content"].update(CONTENT_HIGHLIGHT_MAPPINGS[highlight_indexing])
+
+        if ENABLE_VECTOR_SEARCH:
+            body["settings"]["index"] = {"knn": True}
+            body["mappings"]["properties"]["content_vector"] = {
+                "type": "knn_vector",
+                "dimension": get_embedder().dimension,
+                # lucene engine supports efficient pre-filtering inside the knn query
+                "method": {"name": "hnsw", "space_type": "cosinesimil", "engine": "lucene"}
+            }
+
+        if ENABLE_SYNONYM_ANALYZER:
+            # updateable: the synonym file can be reloaded via
+            # _plugins/_refresh_search_analyzers without closing or reindexing
+            analysis = body["settings"]["analysis"]
+            analysis["filter"] = {"medical_synonyms": {"type": "synonym_graph","synonyms_path": SYNONYMS_PATH,"updateable": True}}
+            analysis["analyzer"]["synonym_search"] = {"type": "custom","tokenizer": "standard","filter": ["lowercase", "medical_synonyms"]}
+            body["mappings"]["properties"]["content"]["search_analyzer"] = "synonym_search"
+
+        return body
 
-    def index_folder(self, folder: str):
+    def index_folder(self, folder: str, resume: bool = True):
         folder = Path(folder)
-        count = 0
+        completed = {}
+        self._start_run(str(folder.resolve()))
+
+        if self.journal:
+            self._run_id, resumed = self.journal.start_run(str(folder.resolve()), resume)
+            completed = self.journal.completed(self._run_id)
+            self.run_stats.update(run_id=self._run_id, resumed=resumed)
+
+        count = self._bulk_index(self._iter_documents(folder, completed))
+
+        if self.journal:
+            self.journal.finish_run(self._run_id)
+        return count
+
+    def index_files(self, files, source_folder: str = None):
+        """
+        Index an explicit list of files (no folder walk, no journal).
+        Used by distributed workers on the batches they claim; source_folder
+        is the crawl root, which picks the partition under the folder scheme.
+        """
+        self._start_run(source_folder)
+        def documents():
+            for file in map(Path, files):
+                # Files may disappear between enqueue and claim
+                if file.is_file():
+                    yield from self._iter_file_documents(file, {})
+
+        return self._bulk_index(documents())
+
+    def unacked_files(self) -> set:
+        """
+        Files (archives for members) with at least one document the cluster
+        rejected or never acknowledged during the last run.
+        """
+        with self._stats_lock:
+            return {doc_id.split("!/", 1)[0] for doc_id in self._dropped_ids}
+
+    def acked_per_file(self) -> dict:
+        """
+        File (archive for members) -> documents acknowledged during the last run.
+        """
+        with self._stats_lock:
+            return dict(self._acked_files)
+
+    def _iter_documents(self, folder: Path, completed: dict):
         for file in folder.rglob("*"):
-            if not file.is_file():
-                continue
-            extractor = EXTRACTORS.get(file.suffix.lower())
-            if not extractor:
+            if file.is_file():
+                yield from self._iter_file_documents(file, completed)
+
+    def _iter_file_documents(self, file: Path, completed: dict):
+        if archive_suffix(file.name):
+            yield from self._iter_archive_documents(file, completed)
+            return
+        extractor = EXTRACTORS.get(file.suffix.lower())
+        if not extractor:
+            return
+
+        doc_id = str(file.resolve())
+        stat = file.stat()
+        if completed.get(doc_id) == (stat.st_mtime, stat.st_size):
+            self.run_stats["files_skipped"] += 1
+            return
+
+        content = extractor(file)
+        if not content:
+            self._journal_mark(doc_id, stat, "skipped")
+            return
+
+        self._journal_mark(doc_id, stat, "extracted")
+        yield doc_id, self._document(
+            doc_id, file.name, datetime.fromtimestamp(stat.st_mtime), stat.st_size, content
+        )
+
+    def _iter_archive_documents(self, archive: Path, completed: dict):
+        """
+        Members are identified as "<archive path>!/<member path>"; the journal
+        tracks them against the archive's own mtime/size.
+        """
+        stat = archive.stat()
+        archive_id = str(archive.resolve())
+        if completed.get(archive_id) == (stat.st_mtime, stat.st_size):
+            # Every member acked or skipped: no need to decompress it again
+            self.run_stats["files_skipped"] += 1
+            return
+
+        for member in iter_archive_members(archive, archive.name):
+            doc_id = f"{archive_id}!/{member.inner_path}"
+            if completed.get(doc_id) == (stat.st_mtime, stat.st_size):
+                self.run_stats["files_skipped"] += 1
                 continue
-            content = extractor(file)
+
+            filename = member.inner_path.rsplit("/", 1)[-1]
+            extractor = EXTRACTORS[Path(filename).suffix.lower()]
+            stream = io.BytesIO(member.data)
+            # Shown by extractors that report per-document stats (recent_pdfs)
+            stream.name = f"{archive.name}!/{member.inner_path}"
+            content = extractor(stream)
             if not content:
+                self._journal_mark(doc_id, stat, "skipped")
                 continue
 
-            self.client.index(
-                index=self.index_name,
-                id=str(file.resolve()),
-                body={
-                    "path": str(file.resolve()),
-                    "filename": file.name,
-                    "filetype": file.suffix.lower().lstrip("."),
-                    "modified": datetime.fromtimestamp(
-                        file.stat().st_mtime
-                    ).strftime("%Y-%m-%dT%H:%M:%S"),
-                    "size_bytes": file.stat().st_size,
-                    "content": content
-                }
+            self._journal_mark(doc_id, stat, "extracted")
+            yield doc_id, self._document(
+                doc_id, filename, member.modified or datetime.fromtimestamp(stat.st_mtime), len(member.data), content
             )
-            count += 1
+
+        self._journal_mark(archive_id, stat, "archive")
+
+    def _document(self, doc_id, filename, modified, size_bytes, content):
+        return {
+            "path": doc_id,
+            "filename": filename,
+            "filetype": Path(filename).suffix.lower().lstrip("."),
+            "modified": modified.strftime("%Y-%m-%dT%H:%M:%S"),
+            "size_bytes": size_bytes,
+            "content": content
+        }
+
+    def _reset_run_stats(self):
+        # docs_failed: rejected by the cluster with a non-retryable error
+        # docs_given_up: still rejected after BULK_MAX_RETRIES retries
+        self.run_stats = {
+            "run_id": None,
+            "resumed": False,
+            "files_skipped": 0,
+            "docs_failed": 0,
+            "docs_given_up": 0,
+        }
+        self._dropped_ids = set()
+        self._acked_files = Counter()
+
+    def _count_dropped(self, key, doc_ids):
+        with self._stats_lock:
+            self.run_stats[key] += len(doc_ids)
+            self._dropped_ids.update(doc_ids)
+
+    def _journal_mark(self, doc_id, stat, status):
+        if self.journal:
+            self.journal.mark(self._run_id, doc_id, stat.st_mtime, stat.st_size, status)
+
+    # ---------------------------
+    # Bulk pipeline
+    # ---------------------------
+    def _bulk_index(self, docs):
+        """
+        Send documents in adaptive bulk batches.
+        Batch size and the number of in-flight batches follow bulk_controller,
+        so extraction of the next batch overlaps with requests already in flight.
+        """
+        docs = iter(docs)
+        count = 0
+        in_flight = set()
+
+        with ThreadPoolExecutor(max_workers=BULK_MAX_CONCURRENCY) as pool:
+            while True:
+                batch_size, concurrency = bulk_controller.batch_params()
+
+                while len(in_flight) >= concurrency:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    count += sum(f.result() for f in done)
+
+                batch = self._next_batch(docs, batch_size)
+                if not batch:
+                    break
+                in_flight.add(pool.submit(self._send_batch, batch))
+
+            for f in in_flight:
+                count += f.result()
+
         return count
+
+    def _delete_other_copies(self, doc_ids, targets) -> bool:
+        """
+        Partitions are picked from mutable values (year of modified, crawl
+        root), so a document may already sit in another partition from an
+        earlier run. Delete every copy outside its new partition; returns
+        False if that could not be done.
+        """
+        by_index = {}
+        for doc_id in doc_ids:
+            by_index.setdefault(targets[doc_id], []).append(doc_id)
+        query = {
+            "bool": {
+                "should": [
+                    {"bool": {"filter": [{"ids": {"values": ids}}], "must_not": [{"term": {"_index": index}}]}}
+                    for index, ids in by_index.items()
+                ],
+                "minimum_should_match": 1
+            }
+        }
+
+        attempt = 0
+        while True:
+            try:
+                self.client.delete_by_query(index=self.index_name, body={"query": query}, conflicts="proceed")
+                return True
+            except Exception as e:
+                if not is_retryable(e) or attempt >= BULK_MAX_RETRIES:
+                    print(f"Could not remove older partition copies of {len(doc_ids)} documents: {e}")
+                    return False
+                time.sleep(backoff_delay(attempt))
+                attempt += 1
+
+    def _next_batch(self, docs, batch_size):
+        batch = []
+        batch_bytes = 0
+        for doc_id, source in docs:
+            batch.append((doc_id, source))
+            batch_bytes += len(source.get("content") or "")
+            if len(batch) >= batch_size or batch_bytes >= BULK_MAX_BYTES:
+                break
+        return batch
+
+    def _send_batch(self, batch):
+        """
+        Send one bulk request, retrying rejected items with backoff.
+        Returns the number of documents acknowledged by the cluster.
+        """
+        indexed = 0
+        attempt = 0
+
+        if ENABLE_VECTOR_SEARCH:
+            # Only indices created with the knn_vector mapping take vectors; on
+            # older ones bulk would dynamically map content_vector as plain floats
+            knn = {}
+            with_vectors = []
+            for doc_id, source in batch:
+                index = self._target_index(source)
+                if index not in knn:
+                    knn[index] = live_knn_vector(self.client, index)
+                if knn[index]:
+                    with_vectors.append(source)
+            # Encoded per batch on the bulk thread pool, overlapping with extraction
+            vectors = embed_texts([source["content"] for source in with_vectors])
+            for source, vector in zip(with_vectors, vectors):
+                source["content_vector"] = vector
+
+        while batch:
+            body = []
+            targets = {}
+            for doc_id, source in batch:
+                targets[doc_id] = self._target_index(source)
+                body.append({"index": {"_index": targets[doc_id], "_id": doc_id}})
+                body.append(source)
+
+            start = time.monotonic()
+            try:
+                res = self.client.bulk(body=body)
+            except Exception as e:
+                if not is_retryable(e):
+                    bulk_controller.record_failure(len(batch))
+                    raise
+                # Only cluster-side rejections / timeouts drive the backoff
+                bulk_controller.record(0, len(batch), time.monotonic() - start)
+                if attempt >= BULK_MAX_RETRIES:
+                    # Same as items still rejected after the last retry:
+                    # count them and let the run go on
+                    bulk_controller.record_failure(len(batch))
+                    self._count_dropped("docs_given_up", [doc_id for doc_id, _ in batch])
+                    print(f"Giving up on {len(batch)} documents after {attempt} retries: {e}")
+                    break
+                bulk_controller.record_retry()
+                time.sleep(backoff_delay(attempt))
+                attempt += 1
+                continue
+            latency = time.monotonic() - start
+
+            acked = []
+            retry = []
+            failed = []
+            for (doc_id, source), item in zip(batch, res["items"]):
+                result = item.get("index", {})
+                status = result.get("status", 500)
+                if status < 300:
+                    acked.append(doc_id)
+                elif status in RETRYABLE_STATUS:
+                    retry.append((doc_id, source))
+                elif (result.get("error") or {}).get("type") == "index_not_found_exception":
+                    # Deleted mid-run (with index auto-creation off): forget it
+                    # so the retry recreates it with the full mapping
+                    with _ensure_lock:
+                        self._ensured.discard(result.get("_index"))
+                    retry.append((doc_id, source))
+                else:
+                    failed.append(doc_id)
+                    print(f"Bulk index failed for {doc_id}: {result.get('error')}")
+
+            bulk_controller.record(len(acked), len(retry), latency)
+            if acked and is_partitioned() and not self._delete_other_copies(acked, targets):
+                # Not journaled as acked, so the document is indexed (and its
+                # old copy removed) again by a resumed run or a worker retry
+                self._count_dropped("docs_given_up", acked)
+                acked = []
+
+            indexed += len(acked)
+            with self._stats_lock:
+                self._acked_files.update(doc_id.split("!/", 1)[0] for doc_id in acked)
+            if self.journal:
+                self.journal.mark_acked(self._run_id, acked)
+            if failed:
+                bulk_controller.record_failure(len(failed))
+                self._count_dropped("docs_failed", failed)
+
+            if retry and attempt >= BULK_MAX_RETRIES:
+                bulk_controller.record_failure(len(retry))
+                self._count_dropped("docs_given_up", [doc_id for doc_id, _ in retry])
+                print(f"Giving up on {len(retry)} documents after {attempt} retries")
+                break
+            if retry:
+                bulk_controller.record_retry()
+                time.sleep(backoff_delay(attempt))
+                attempt += 1
+            batch = retry
+
+        return indexed
@@ -0,0 +1,147 @@
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from config.settings import INDEX_JOURNAL_PATH
+
+
+class IndexJournal:
+    """
+    Durable progress journal for index_folder runs (local SQLite file).
+
+    Every document moves through:
+        extracted -> acked   (acknowledged by the cluster)
+        skipped              (no extractor output, nothing to index)
+
+    An archive additionally gets a row of its own once all of its members
+    have been read:
+        archive              (complete when no member is still "extracted")
+    so a resumed run can skip a finished archive without decompressing it.
+
+    A run that never reached finish_run() is resumed by the next run on the
+    same folder; documents already acked or skipped, whose source file is
+    unchanged, are not extracted again.
+    """
+
+    def __init__(self, path):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS runs (
+                run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                folder TEXT NOT NULL,
+                started_at REAL NOT NULL,
+                finished_at REAL
+            );
+            CREATE TABLE IF NOT EXISTS documents (
+                run_id INTEGER NOT NULL,
+                doc_id TEXT NOT NULL,
+                mtime REAL NOT NULL,
+                size INTEGER NOT NULL,
+                status TEXT NOT NULL,
+                PRIMARY KEY (run_id, doc_id)
+            );
+            """
+        )
+
+    def start_run(self, folder: str, resume: bool = True) -> tuple[int, bool]:
+        """
+        Returns (run_id, resumed).
+        """
+        with self._lock:
+            if resume:
+                row = self._conn.execute(
+                    "SELECT run_id FROM runs WHERE folder = ? AND finished_at IS NULL "
+                    "ORDER BY run_id DESC LIMIT 1",
+                    (folder,),
+                ).fetchone()
+                if row:
+                    return row[0], True
+
+            # A fresh run supersedes any unfinished one on the same folder;
+            # their document rows are dropped so the journal stays bounded
+            self._conn.execute("BEGIN")
+            self._conn.execute(
+                "DELETE FROM documents WHERE run_id IN "
+                "(SELECT run_id FROM runs WHERE folder = ? AND finished_at IS NULL)",
+                (folder,),
+            )
+            self._conn.execute(
+                "UPDATE runs SET finished_at = ? WHERE folder = ? AND finished_at IS NULL",
+                (time.time(), folder),
+            )
+            cur = self._conn.execute(
+                "INSERT INTO runs (folder, started_at) VALUES (?, ?)",
+                (folder, time.time()),
+            )
+            self._conn.execute("COMMIT")
+            return cur.lastrowid, False
+
+    def finish_run(self, run_id: int):
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.execute(
+                "UPDATE runs SET finished_at = ? WHERE run_id = ?",
+                (time.time(), run_id),
+            )
+            self._conn.execute("DELETE FROM documents WHERE run_id = ?", (run_id,))
+            self._conn.execute("COMMIT")
+
+    def completed(self, run_id: int) -> dict:
+        """
+        doc_id -> (mtime, size) for documents that need no further work.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT doc_id, mtime, size FROM documents "
+                "WHERE run_id = ? AND status IN ('acked', 'skipped')",
+                (run_id,),
+            ).fetchall()
+            # Member ids are "<archive>!/<member>", i.e. the range ["<archive>!/", "<archive>!0")
+            rows += self._conn.execute(
+                "SELECT a.doc_id, a.mtime, a.size FROM documents a "
+                "WHERE a.run_id = ? AND a.status = 'archive' AND NOT EXISTS ("
+                "SELECT 1 FROM documents m WHERE m.run_id = a.run_id AND m.status = 'extracted' "
+                "AND m.doc_id >= a.doc_id || '!/' AND m.doc_id < a.doc_id || '!0')",
+                (run_id,),
+            ).fetchall()
+        return {doc_id: (mtime, size) for doc_id, mtime, size in rows}
+
+    def mark(self, run_id: int, doc_id: str, mtime: float, size: int, status: str):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO documents (run_id, doc_id, mtime, size, status) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (run_id, doc_id, mtime, size, status),
+            )
+
+    def mark_acked(self, run_id: int, doc_ids: list[str]):
+        if not doc_ids:
+            return
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                "UPDATE documents SET status = 'acked' WHERE run_id = ? AND doc_id = ?",
+                [(run_id, doc_id) for doc_id in doc_ids],
+            )
+            self._conn.execute("COMMIT")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_journal = None
+_journal_lock = threading.Lock()
+
+
+def get_journal() -> IndexJournal:
+    global _journal
+    with _journal_lock:
+        if _journal is None:
+            _journal = IndexJournal(INDEX_JOURNAL_PATH)
+        return _journal
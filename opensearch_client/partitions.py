@@ -0,0 +1,142 @@
+import hashlib
+import os
+import re
+import threading
+import time
+from datetime import date
+from pathlib import Path
+from opensearchpy.exceptions import NotFoundError
+from config.settings import PARTITION_SCHEME, PARTITION_CACHE_SECONDS
+
+# Partition indices live behind the OPENSEARCH_INDEX alias:
+#   year   -> <alias>-<year of modified>
+#   folder -> <alias>-src-<folder name>-<hash of full folder path>
+# Each partition records its key in the mapping _meta, which is what
+# select_partitions() prunes on.
+
+PARTITION_SCHEMES = ("none", "year", "folder")
+
+if PARTITION_SCHEME not in PARTITION_SCHEMES:
+    raise ValueError(f"PARTITION_SCHEME must be one of {PARTITION_SCHEMES}, got {PARTITION_SCHEME!r}")
+
+
+def is_partitioned() -> bool:
+    return PARTITION_SCHEME != "none"
+
+
+def partition_for(alias: str, source: dict, source_folder: str | None) -> tuple[str, dict]:
+    """
+    Return (index name, partition _meta) for a document.
+    """
+    if PARTITION_SCHEME == "year":
+        year = int(source["modified"][:4])
+        return f"{alias}-{year}", {"year": year}
+
+    folder = str(source_folder)
+    slug = re.sub(r"[^a-z0-9]+", "-", Path(folder).name.lower()).strip("-") or "root"
+    digest = hashlib.sha1(folder.encode()).hexdigest()[:8]
+    return f"{alias}-src-{slug[:40]}-{digest}", {"source_folder": folder}
+
+
+_cache_lock = threading.Lock()
+_cache = {}  # index expression -> (fetched_at, {index: mapping})
+
+# A year-scheme search whose range has a year without a known partition
+# re-reads the partition list, at most this often per process
+MISS_REFRESH_SECONDS = 5
+
+
+def live_mappings(client, index: str, max_age: float = PARTITION_CACHE_SECONDS) -> dict:
+    """
+    {index name: mapping} for every index the expression (an index, alias
+    or comma-separated list) resolves to, cached for max_age seconds.
+    """
+    with _cache_lock:
+        cached = _cache.get(index)
+        if cached and time.monotonic() - cached[0] < max_age:
+            return cached[1]
+
+    try:
+        mappings = {
+            name: body.get("mappings", {})
+            for name, body in client.indices.get_mapping(index=index).items()
+        }
+    except NotFoundError:
+        mappings = {}
+
+    with _cache_lock:
+        _cache[index] = (time.monotonic(), mappings)
+    return mappings
+
+
+def list_partitions(client, alias: str, max_age: float = PARTITION_CACHE_SECONDS) -> dict:
+    """
+    {index name: partition meta} for every index behind the alias.
+    """
+    return {
+        index: mapping.get("_meta", {}).get("partition", {})
+        for index, mapping in live_mappings(client, alias, max_age).items()
+    }
+
+
+def _missing_years(partitions: dict, date_from, date_to) -> bool:
+    years = {meta["year"] for meta in partitions.values() if "year" in meta}
+    if not years:
+        return False
+    first = date_from.year if date_from else min(years)
+    last = date_to.year if date_to else date.today().year
+    return any(year not in years for year in range(first, last + 1))
+
+
+def invalidate_mappings(*indices: str):
+    # Called after creating an index, so its mapping (or the alias's new
+    # partition list) is seen without waiting out the cache
+    with _cache_lock:
+        for index in indices:
+            _cache.pop(index, None)
+
+
+def _folder_overlaps(partition_folder: str, folders: list[str]) -> bool:
+    # A partition is needed when a requested folder lies inside its crawl
+    # root, or the crawl root lies inside a requested folder
+    root = partition_folder.rstrip(os.sep) + os.sep
+    for folder in folders:
+        folder = folder.rstrip(os.sep) + os.sep
+        if folder.startswith(root) or root.startswith(folder):
+            return True
+    return False
+
+
+def select_partitions(client, alias: str, date_from=None, date_to=None, folders=None) -> list[str]:
+    """
+    Minimal set of indices a search has to touch given its filters.
+
+    The partition list is cached per process, and partitions created by
+    other processes only show up once it expires. An empty list or an empty
+    selection may therefore be stale, so both fall back to the alias
+    (searching everything through it) rather than answering with no hits.
+    """
+    if not is_partitioned():
+        return [alias]
+
+    partitions = list_partitions(client, alias)
+    if PARTITION_SCHEME == "year" and _missing_years(partitions, date_from, date_to):
+        # Possibly a year partition another process created since the list was cached
+        partitions = list_partitions(client, alias, MISS_REFRESH_SECONDS)
+    if not partitions:
+        return [alias]
+    selected = []
+    for index, meta in partitions.items():
+        if PARTITION_SCHEME == "year" and "year" in meta:
+            if date_from and meta["year"] < date_from.year:
+                continue
+            if date_to and meta["year"] > date_to.year:
+                continue
+        if PARTITION_SCHEME == "folder" and folders and "source_folder" in meta:
+            if not _folder_overlaps(meta["source_folder"], folders):
+                continue
+        selected.append(index)
+
+    if not selected or len(selected) == len(partitions):
+        return [alias]
+    return sorted(selected)
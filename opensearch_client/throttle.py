@@ -0,0 +1,118 @@
+import random
+import threading
+import time
+from collections import deque
+from opensearchpy.exceptions import ConnectionError, ConnectionTimeout, TransportError
+from config.settings import (
+    BULK_INITIAL_DOCS,
+    BULK_MIN_DOCS,
+    BULK_MAX_DOCS,
+    BULK_MAX_CONCURRENCY,
+    BULK_TARGET_LATENCY_MS,
+    BULK_BACKOFF_BASE_MS,
+    BULK_BACKOFF_CAP_MS,
+)
+
+# 429 = es_rejected_execution_exception (write queue full), 5xx = node overloaded / restarting
+RETRYABLE_STATUS = {429, 502, 503, 504}
+
+
+def is_retryable(exc: Exception) -> bool:
+    if isinstance(exc, (ConnectionError, ConnectionTimeout)):
+        return True
+    if isinstance(exc, TransportError):
+        return exc.status_code in RETRYABLE_STATUS
+    return False
+
+
+def backoff_delay(attempt: int) -> float:
+    """
+    Bounded exponential backoff with full jitter, in seconds.
+    """
+    cap = min(BULK_BACKOFF_CAP_MS, BULK_BACKOFF_BASE_MS * (2 ** attempt))
+    return random.uniform(0, cap) / 1000.0
+
+
+class AdaptiveBulkController:
+    """
+    AIMD controller for bulk batch size and in-flight request concurrency.
+
+    - Rejections (429/5xx) halve both batch size and concurrency.
+    - Batches slower than the target latency shrink the batch size.
+    - Clean, fast batches grow the batch size additively, then concurrency.
+
+    One instance is shared by every indexing run in the process, so
+    concurrent runs back off together when the cluster is saturated.
+    """
+
+    def __init__(self, initial_docs, min_docs, max_docs, max_concurrency, target_latency_ms):
+        self.min_docs = min_docs
+        self.max_docs = max_docs
+        self.max_concurrency = max_concurrency
+        self.target_latency = target_latency_ms / 1000.0
+        self.batch_size = max(min_docs, min(initial_docs, max_docs))
+        self.concurrency = 1
+
+        self._lock = threading.Lock()
+        self._window = deque(maxlen=200)  # (timestamp, docs_ok, docs_rejected, latency)
+        self._totals = {"batches": 0, "docs_indexed": 0, "docs_rejected": 0, "retries": 0, "failures": 0}
+        self._last_backoff = None
+
+    def batch_params(self):
+        with self._lock:
+            return self.batch_size, self.concurrency
+
+    def record(self, docs_ok: int, docs_rejected: int, latency: float):
+        with self._lock:
+            self._window.append((time.monotonic(), docs_ok, docs_rejected, latency))
+            self._totals["batches"] += 1
+            self._totals["docs_indexed"] += docs_ok
+            self._totals["docs_rejected"] += docs_rejected
+
+            if docs_rejected:
+                self.batch_size = max(self.min_docs, self.batch_size // 2)
+                self.concurrency = max(1, self.concurrency // 2)
+                self._last_backoff = time.time()
+            elif latency > self.target_latency:
+                self.batch_size = max(self.min_docs, int(self.batch_size * 0.75))
+            elif self.batch_size < self.max_docs:
+                self.batch_size = min(self.max_docs, self.batch_size + max(1, self.min_docs))
+            elif self.concurrency < self.max_concurrency:
+                self.concurrency += 1
+
+    def record_retry(self):
+        with self._lock:
+            self._totals["retries"] += 1
+
+    def record_failure(self, docs: int):
+        with self._lock:
+            self._totals["failures"] += docs
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            now = time.monotonic()
+            recent = [w for w in self._window if now - w[0] <= 60]
+            ok = sum(w[1] for w in recent)
+            rejected = sum(w[2] for w in recent)
+            span = (now - recent[0][0]) if len(recent) > 1 else 0
+            latencies = sorted(w[3] for w in recent)
+
+            return {
+                "batch_size": self.batch_size,
+                "concurrency": self.concurrency,
+                "docs_per_sec": round(ok / span, 2) if span else None,
+                "rejection_rate": round(rejected / (ok + rejected), 4) if (ok + rejected) else 0.0,
+                "p50_latency_ms": round(latencies[len(latencies) // 2] * 1000, 1) if latencies else None,
+                "cluster_bound": bool(rejected) or bool(latencies and latencies[len(latencies) // 2] > self.target_latency),
+                "last_backoff": self._last_backoff,
+                "totals": dict(self._totals),
+            }
+
+
+bulk_controller = AdaptiveBulkController(
+    initial_docs=BULK_INITIAL_DOCS,
+    min_docs=BULK_MIN_DOCS,
+    max_docs=BULK_MAX_DOCS,
+    max_concurrency=BULK_MAX_CONCURRENCY,
+    target_latency_ms=BULK_TARGET_LATENCY_MS,
+)
@@ -1,15 +1,85 @@
+import threading
+from pathlib import Path
 from fastapi import APIRouter, HTTPException
-from models.indexing_models import FolderInput
+from models.indexing_models import FolderInput, ClaimInput, RenewInput, CompleteInput, FailInput
 from opensearch_client.client import get_client
-from opensearch_client.indexer import OpenSearchIndexer
+from opensearch_client.indexer import OpenSearchIndexer, is_indexable
+from opensearch_client.journal import get_journal
+from opensearch_client.throttle import bulk_controller
+from extractors.pdf_pages import pdf_stats
 from config.settings import OPENSEARCH_INDEX
 from utils.response import success_response
+from utils.profiler import profiled
+from utils.work_queue import get_work_queue
 
 router = APIRouter()
 
 @router.post("/index-folder")
+@profiled("index_folder")
 def index_folder(payload: FolderInput):
+    if payload.distributed:
+        return enqueue_folder(payload.folder)
+
     client = get_client()
-    indexer = OpenSearchIndexer(client, OPENSEARCH_INDEX)
-    count = indexer.index_folder(payload.folder)
-    return success_response("Folder indexed", {"files_indexed": count})
+    indexer = OpenSearchIndexer(client, OPENSEARCH_INDEX, journal=get_journal())
+    count = indexer.index_folder(payload.folder, resume=payload.resume)
+    return success_response("Folder indexed", {"files_indexed": count, **indexer.run_stats})
+
+def enqueue_folder(folder: str):
+    root = Path(folder)
+    if not root.is_dir():
+        raise HTTPException(400, f"Folder not found: {folder}")
+
+    queue = get_work_queue()
+    job_id = queue.create_job(str(root.resolve()), OPENSEARCH_INDEX)
+
+    # The crawl runs in the background; workers start on the first chunk
+    # while the rest of the tree is still being enqueued
+    files = (f.resolve() for f in root.rglob("*") if f.is_file() and is_indexable(f))
+    threading.Thread(target=queue.enqueue, args=(job_id, files), daemon=True).start()
+
+    return success_response("Folder enqueued", {"job_id": job_id})
+
+@router.get("/index-jobs/{job_id}")
+def index_job(job_id: str):
+    progress = get_work_queue().progress(job_id)
+    if progress is None:
+        raise HTTPException(404, f"Unknown job: {job_id}")
+    return success_response("Indexing job progress", progress)
+
+# ---------------------------
+# Work queue access for workers on other hosts
+# (the SQLite queue itself stays on this host's local disk)
+# ---------------------------
+@router.post("/work-queue/claim")
+def work_queue_claim(payload: ClaimInput):
+    claimed = get_work_queue().claim(payload.owner, payload.limit)
+    if not claimed:
+        return success_response("Queue empty")
+    job_id, index_name, folder, tasks = claimed
+    return success_response(
+        "Tasks leased",
+        {"job_id": job_id, "index": index_name, "folder": folder, "tasks": tasks}
+    )
+
+@router.post("/work-queue/renew")
+def work_queue_renew(payload: RenewInput):
+    get_work_queue().renew(payload.owner, payload.task_ids)
+    return success_response("Leases renewed")
+
+@router.post("/work-queue/complete")
+def work_queue_complete(payload: CompleteInput):
+    get_work_queue().complete(payload.owner, payload.job_id, payload.task_ids, payload.docs_indexed)
+    return success_response("Tasks completed")
+
+@router.post("/work-queue/fail")
+def work_queue_fail(payload: FailInput):
+    get_work_queue().fail(payload.owner, payload.task_ids, payload.error)
+    return success_response("Tasks failed")
+
+@router.get("/index-status")
+def index_status():
+    return success_response(
+        "Indexing throughput",
+        {**bulk_controller.snapshot(), "recent_pdfs": list(pdf_stats)}
+    )
@@ -1,13 +1,32 @@
 from fastapi import APIRouter, HTTPException
 from datetime import datetime, date
+from pathlib import Path
+import json
+import os
 from models.search_models import SearchInput
 from opensearch_client.client import get_client
-from config.settings import OPENSEARCH_INDEX, ENABLE_AI_EXPANSION
+from config.settings import (
+    OPENSEARCH_INDEX,
+    ENABLE_AI_EXPANSION,
+    DEFAULT_HIGHLIGHT_MODE,
+    HIGHLIGHT_MAX_ANALYZER_OFFSET,
+    ENABLE_VECTOR_SEARCH,
+)
+from opensearch_client.hybrid import hybrid_search
+from opensearch_client.partitions import select_partitions
+from opensearch_client.indexer import live_highlight_profile, live_synonym_search, live_knn_vector
 from utils.response import success_response
+from utils.profiler import profiled
 from utils.ai_expander import expand_with_ai
+from utils.singleflight import SingleFlight
+from utils.embedder import embed_texts
 
 router = APIRouter()
 
+# Identical concurrent requests share one AI expansion / one backend search
+expansion_flight = SingleFlight("ai_expansion")
+search_flight = SingleFlight("search")
+
 
 # ---------------------------
 # Helpers
@@ -41,10 +60,71 @@ def parse_keywords(raw: str) -> list[str]:
     return keywords
 
 
+HIGHLIGHT_MODES = ("fast", "quality", "none")
+
+
+def build_highlight(mode: str, profile: str) -> dict:
+    """
+    fast    - one short fragment from the offsets/term vectors stored at index time
+    quality - three sentence-bounded fragments (more work per hit)
+    none    - no content highlighting; filename highlighting is always cheap
+
+    profile is what the searched indices store for content (see
+    live_highlight_profile), not the current CONTENT_HIGHLIGHT_INDEXING setting.
+    """
+    fields = {
+        "filename": {
+            "fragment_size": 150,
+            "number_of_fragments": 1
+        }
+    }
+
+    if mode != "none":
+        content = {
+            # fvh needs term vectors on every searched index; unified reads
+            # postings offsets when the field has them and re-analyzes otherwise
+            "type": "fvh" if profile == "term_vectors" else "unified",
+            "fragment_size": 150,
+            "number_of_fragments": 1
+        }
+        if mode == "quality":
+            content.update(fragment_size=200, number_of_fragments=3, order="score")
+            if content["type"] == "unified":
+                content["boundary_scanner"] = "sentence"
+        if profile == "none":
+            content["max_analyzer_offset"] = HIGHLIGHT_MAX_ANALYZER_OFFSET
+        fields = {"content": content, **fields}
+
+    return {"fields": fields}
+
+
+def build_vector_query(keyword: str, filters: list, source: dict, k: int) -> dict:
+    """
+    k-NN half of a hybrid search; the same filters are applied inside the
+    knn clause so they restrict candidates instead of post-filtering top-k.
+    """
+    knn = {
+        "vector": embed_texts([keyword])[0],
+        "k": k
+    }
+    if filters:
+        knn["filter"] = {"bool": {"filter": filters}}
+
+    return {
+        "_source": source,
+        "query": {
+            "knn": {
+                "content_vector": knn
+            }
+        }
+    }
+
+
 # ---------------------------
 # Search Endpoint
 # ---------------------------
 @router.post("/search")
+@profiled("search")
 def search(payload: SearchInput):
     client = get_client()
 
@@ -60,6 +140,13 @@ def search(payload: SearchInput):
             "from_ + size must be <= 10000 (OpenSearch limit). Use pagination or scroll."
         )
 
+    if payload.search_mode == "hybrid" and not ENABLE_VECTOR_SEARCH:
+        raise HTTPException(400, "hybrid search requires ENABLE_VECTOR_SEARCH")
+
+    highlight_mode = (payload.highlight or DEFAULT_HIGHLIGHT_MODE).lower()
+    if highlight_mode not in HIGHLIGHT_MODES:
+        raise HTTPException(400, f"highlight must be one of {', '.join(HIGHLIGHT_MODES)}")
+
     # ---------------------------
     # Validate dates
     # ---------------------------
@@ -74,13 +161,35 @@ def search(payload: SearchInput):
     if date_to and date_to > today:
         raise HTTPException(400, "date_to cannot be in the future")
 
+    folders = None
+    if payload.folders:
+        folders = sorted({str(Path(f).resolve()) for f in payload.folders})
+
+    # ---------------------------
+    # Partition pruning: only touch indices the filters can match
+    # ---------------------------
+    index = ",".join(select_partitions(client, OPENSEARCH_INDEX, date_from, date_to, folders))
+
+    if payload.search_mode == "hybrid" and not live_knn_vector(client, index):
+        raise HTTPException(
+            400,
+            "hybrid search needs a knn_vector content_vector field; "
+            "reindex into an index created with ENABLE_VECTOR_SEARCH"
+        )
+
     # ---------------------------
     # Keyword parsing + AI expansion (OPTIONAL)
+    # The external call is skipped only for content searches against
+    # indices whose live mapping searches content through synonym_search.
     # ---------------------------
     final_keyword = payload.keyword
+    content_synonyms = payload.search_mode != "filename" and live_synonym_search(client, index)
 
-    if ENABLE_AI_EXPANSION:
-        final_keyword = expand_with_ai(payload.keyword)
+    if ENABLE_AI_EXPANSION and not content_synonyms:
+        normalized = " ".join(payload.keyword.lower().split())
+        final_keyword = expansion_flight.do(
+            normalized, lambda: expand_with_ai(payload.keyword)
+        )
 
     keywords = parse_keywords(final_keyword)
     print(f"Search keywords after AI expansion: {keywords}")
@@ -102,11 +211,14 @@ def search(payload: SearchInput):
 
     else:
         for kw in keywords:
+            match = {"query": kw}
+            if content_synonyms:
+                # content is indexed as edge n-grams (no usable positions for
+                # phrases); match multi-word synonyms as plain terms instead
+                match["auto_generate_synonyms_phrase_query"] = False
             should_queries.append({
                 "match": {
-                    "content": {
-                        "query": kw
-                    }
+                    "content": match
                 }
             })
 
@@ -129,7 +241,7 @@ def search(payload: SearchInput):
     if payload.file_types and "all" not in payload.file_types:
         filters.append({
             "terms": {
-                "filetype": [ft.lower() for ft in payload.file_types]
+                "filetype": sorted({ft.lower() for ft in payload.file_types})
             }
         })
 
@@ -147,6 +259,15 @@ def search(payload: SearchInput):
             }
         })
 
+    # Folder filter (path prefix; also prunes folder partitions)
+    if folders:
+        filters.append({
+            "bool": {
+                "should": [{"prefix": {"path": f.rstrip(os.sep) + os.sep}} for f in folders],
+                "minimum_should_match": 1
+            }
+        })
+
     # Size filter (KB → bytes)
     if payload.size_from is not None or payload.size_to is not None:
         size_range = {}
@@ -162,7 +283,7 @@ def search(payload: SearchInput):
     # ---------------------------
     query = {
         "_source": {
-            "excludes": ["content"]   # hide full content
+            "excludes": ["content", "content_vector"]   # hide full content
         },
         "query": {
             "bool": {
@@ -170,27 +291,35 @@ def search(payload: SearchInput):
                 "filter": filters
             }
         },
-        "highlight": {
-            "fields": {
-                "content": {
-                    "fragment_size": 150,
-                    "number_of_fragments": 1
-                },
-                "filename": {
-                    "fragment_size": 150,
-                    "number_of_fragments": 1
-                }
-            }
-        },
         "from": payload.from_,
         "size": payload.size
     }
 
+    query["highlight"] = build_highlight(highlight_mode, live_highlight_profile(client, index))
+
     # ---------------------------
     # Execute search
+    # (keyed on the built query, so requests that differ only in
+    # keyword case / spacing / order of equivalent fields coalesce;
+    # the vector half embeds the raw keyword, so hybrid keys include it)
     # ---------------------------
+    vector_text = payload.keyword if payload.search_mode == "hybrid" else None
+    flight_key = (index, vector_text, json.dumps(query, sort_keys=True))
+
+    if payload.search_mode == "hybrid":
+        def execute():
+            vector_query = build_vector_query(
+                payload.keyword, filters, query["_source"], payload.from_ + payload.size
+            )
+            return hybrid_search(
+                client, index, query, vector_query, payload.from_, payload.size
+            )
+    else:
+        def execute():
+            return client.search(index=index, body=query)
+
     try:
-        res = client.search(index=OPENSEARCH_INDEX, body=query)
+        res = search_flight.do(flight_key, execute)
     except Exception as e:
         raise HTTPException(500, f"Search execution failed: {str(e)}")
 
@@ -223,3 +352,14 @@ def search(payload: SearchInput):
             "results": results
         }
     )
+
+
+@router.get("/search-stats")
+def search_stats():
+    return success_response(
+        "Search coalescing stats",
+        {
+            "search": search_flight.stats(),
+            "ai_expansion": expansion_flight.stats()
+        }
+    )
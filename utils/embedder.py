@@ -0,0 +1,144 @@
+# utils/embedder.py
+#
+# Pluggable CPU-only text embedders for the optional vector search path.
+#
+#   EMBEDDER=hashing                                   (default, no extra dependency)
+#   EMBEDDER=sentence-transformers:all-MiniLM-L6-v2    (pip install sentence-transformers)
+
+import hashlib
+import math
+import re
+import threading
+from collections import OrderedDict
+from config.settings import (
+    EMBEDDER,
+    EMBEDDING_DIMENSION,
+    EMBEDDING_BATCH_SIZE,
+    EMBEDDING_MAX_CHARS,
+    EMBEDDING_CACHE_SIZE,
+)
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+class HashingEmbedder:
+    """
+    Signed feature hashing of word unigrams and bigrams, L2-normalised.
+    Dependency-free and deterministic across processes; captures lexical
+    overlap only, so use a sentence-transformers model for paraphrases.
+    """
+
+    name = "hashing"
+
+    def __init__(self, dimension: int = EMBEDDING_DIMENSION):
+        self.dimension = dimension
+
+    def _embed(self, text: str) -> list[float]:
+        vec = [0.0] * self.dimension
+        tokens = _TOKEN_RE.findall(text.lower())
+        features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+        for feature in features:
+            h = int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=8).digest(), "little")
+            vec[h % self.dimension] += 1.0 if (h >> 63) else -1.0
+        norm = math.sqrt(sum(v * v for v in vec))
+        # knn cosine similarity rejects zero vectors
+        if not norm:
+            vec[0] = 1.0
+            return vec
+        return [v / norm for v in vec]
+
+    def encode(self, texts: list[str]) -> list[list[float]]:
+        return [self._embed(t) for t in texts]
+
+
+class SentenceTransformerEmbedder:
+    def __init__(self, model_name: str):
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError:
+            raise RuntimeError(
+                f"EMBEDDER={EMBEDDER} requires the sentence-transformers package"
+            )
+        self.name = f"sentence-transformers:{model_name}"
+        self.model = SentenceTransformer(model_name, device="cpu")
+        self.dimension = self.model.get_sentence_embedding_dimension()
+
+    def encode(self, texts: list[str]) -> list[list[float]]:
+        vectors = self.model.encode(
+            texts, batch_size=EMBEDDING_BATCH_SIZE, normalize_embeddings=True, show_progress_bar=False
+        )
+        return [v.tolist() for v in vectors]
+
+
+def _create_embedder():
+    if EMBEDDER == "hashing":
+        return HashingEmbedder()
+    if EMBEDDER.startswith("sentence-transformers:"):
+        return SentenceTransformerEmbedder(EMBEDDER.split(":", 1)[1])
+    raise ValueError(f"Unknown EMBEDDER: {EMBEDDER}")
+
+
+_embedder = None
+_embedder_lock = threading.Lock()
+
+
+def get_embedder():
+    global _embedder
+    with _embedder_lock:
+        if _embedder is None:
+            _embedder = _create_embedder()
+        return _embedder
+
+
+class EmbeddingCache:
+    """
+    LRU of embeddings keyed on the SHA-256 of the (truncated) text, so
+    unchanged content re-indexed on later runs is not re-encoded.
+    """
+
+    def __init__(self, capacity: int = EMBEDDING_CACHE_SIZE):
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        self._items = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            vec = self._items.get(key)
+            if vec is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return vec
+
+    def put(self, key, vec):
+        with self._lock:
+            self._items[key] = vec
+            self._items.move_to_end(key)
+            while len(self._items) > self.capacity:
+                self._items.popitem(last=False)
+
+
+embedding_cache = EmbeddingCache()
+
+
+def embed_texts(texts: list[str]) -> list[list[float]]:
+    """
+    Embed texts in batches of EMBEDDING_BATCH_SIZE, encoding only cache misses.
+    """
+    embedder = get_embedder()
+    texts = [(t or "")[:EMBEDDING_MAX_CHARS] for t in texts]
+    keys = [hashlib.sha256(f"{embedder.name}\0{t}".encode()).hexdigest() for t in texts]
+
+    vectors = [embedding_cache.get(k) for k in keys]
+    missing = [i for i, v in enumerate(vectors) if v is None]
+
+    for start in range(0, len(missing), EMBEDDING_BATCH_SIZE):
+        chunk = missing[start:start + EMBEDDING_BATCH_SIZE]
+        for i, vec in zip(chunk, embedder.encode([texts[i] for i in chunk])):
+            vectors[i] = vec
+            embedding_cache.put(keys[i], vec)
+
+    return vectors
@@ -0,0 +1,120 @@
+# utils/index_worker.py
+#
+# Distributed indexing worker. Run any number of these, on any host that can
+# read the files being indexed (at the paths the coordinator enqueued):
+#
+#   python -m utils.index_worker                                   (coordinator host)
+#   python -m utils.index_worker --queue-url http://indexer-api:8000/api
+#   python -m utils.index_worker --batch 50 --once
+
+import argparse
+import os
+import socket
+import threading
+import time
+from pathlib import Path
+from config.settings import (
+    WORKER_BATCH_SIZE,
+    WORKER_LEASE_SECONDS,
+    WORKER_POLL_SECONDS,
+    WORK_QUEUE_URL,
+)
+from opensearch_client.client import get_client
+from opensearch_client.indexer import OpenSearchIndexer
+from utils.work_queue import RemoteWorkQueue, get_work_queue
+
+
+class _LeaseRenewer(threading.Thread):
+    # Keeps the claimed batch leased while a slow extraction is still running
+    def __init__(self, queue, owner, task_ids):
+        super().__init__(name="lease-renewer", daemon=True)
+        self.queue = queue
+        self.owner = owner
+        self.task_ids = task_ids
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(WORKER_LEASE_SECONDS / 3):
+            try:
+                self.queue.renew(self.owner, self.task_ids)
+            except OSError as e:
+                # Try again next tick; the lease has two more ticks to run
+                print(f"[{self.owner}] lease renewal failed: {e}")
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+def process_batch(queue, owner: str, batch_size: int) -> bool:
+    """
+    Claim, extract and bulk-index one batch. Returns False when the queue is empty.
+    """
+    claimed = queue.claim(owner, batch_size)
+    if not claimed:
+        return False
+
+    job_id, index_name, folder, tasks = claimed
+    task_ids = [task_id for task_id, _ in tasks]
+    renewer = _LeaseRenewer(queue, owner, task_ids)
+    renewer.start()
+    try:
+        indexer = OpenSearchIndexer(get_client(), index_name)
+        indexer.index_files([path for _, path in tasks], source_folder=folder)
+        unacked = indexer.unacked_files()
+        acked = indexer.acked_per_file()
+    except Exception as e:
+        renewer.stop()
+        queue.fail(owner, task_ids, str(e))
+        print(f"[{owner}] batch of {len(tasks)} files failed for job {job_id}: {e}")
+        return True
+
+    renewer.stop()
+    # Files with documents the cluster never acknowledged go back through
+    # fail() so they are retried, or marked failed once out of attempts.
+    # Only completed files count toward docs_indexed: a partly acknowledged
+    # archive is indexed again in full on retry.
+    dropped, done, docs = [], [], 0
+    for task_id, path in tasks:
+        path = str(Path(path).resolve())
+        if path in unacked:
+            dropped.append(task_id)
+        else:
+            done.append(task_id)
+            docs += acked.get(path, 0)
+    if dropped:
+        queue.fail(owner, dropped, "documents not acknowledged by the cluster")
+    queue.complete(owner, job_id, done, docs)
+    print(f"[{owner}] job {job_id}: {len(tasks)} files, {docs} documents indexed, {len(dropped)} files to retry")
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Distributed indexing worker")
+    parser.add_argument("--batch", type=int, default=WORKER_BATCH_SIZE, help="files claimed per lease")
+    parser.add_argument("--once", action="store_true", help="exit when the queue is empty")
+    parser.add_argument(
+        "--queue-url", default=WORK_QUEUE_URL,
+        help="coordinator API base URL; required on hosts other than the coordinator's",
+    )
+    args = parser.parse_args()
+
+    owner = f"{socket.gethostname()}:{os.getpid()}"
+    queue = RemoteWorkQueue(args.queue_url) if args.queue_url else get_work_queue()
+    print(f"Worker {owner} started")
+
+    while True:
+        try:
+            if process_batch(queue, owner, args.batch):
+                continue
+        except OSError as e:
+            # Coordinator unreachable; leases held by this worker expire and
+            # the tasks are claimed again
+            print(f"[{owner}] work queue unavailable: {e}")
+        if args.once:
+            break
+        time.sleep(WORKER_POLL_SECONDS)
+
+
+if __name__ == "__main__":
+    main()
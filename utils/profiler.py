@@ -0,0 +1,177 @@
+# utils/profiler.py
+
+import cProfile
+import functools
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from contextvars import ContextVar
+from pathlib import Path
+from config.settings import (
+    PROFILE_ALLOW_HEADER,
+    PROFILE_DIR,
+    PROFILE_MAX_PER_MINUTE,
+    PROFILE_MODE,
+    PROFILE_SAMPLE_INTERVAL_MS,
+    PROFILE_SAMPLE_RATE,
+)
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_MODES = ("sample", "trace")
+
+# Set by ProfilingMiddleware for the chosen requests only; copied into the
+# threadpool that runs sync endpoints, where @profiled picks it up.
+_profile_request: ContextVar = ContextVar("profile_request", default=None)
+
+_budget_lock = threading.Lock()
+_recent_profiles = deque()
+
+
+def _within_budget() -> bool:
+    # Caps how many requests per minute pay profiling overhead,
+    # regardless of how many ask for it via the header.
+    now = time.monotonic()
+    with _budget_lock:
+        while _recent_profiles and now - _recent_profiles[0] > 60:
+            _recent_profiles.popleft()
+        if len(_recent_profiles) >= PROFILE_MAX_PER_MINUTE:
+            return False
+        _recent_profiles.append(now)
+        return True
+
+
+def _requested_mode(scope) -> str | None:
+    if PROFILE_ALLOW_HEADER:
+        for name, value in scope.get("headers", ()):
+            if name == PROFILE_HEADER:
+                value = value.decode("latin-1").strip().lower()
+                if value in PROFILE_MODES:
+                    return value
+                if value in ("1", "true", "yes"):
+                    return PROFILE_MODE
+                return None
+    if PROFILE_SAMPLE_RATE and random.random() < PROFILE_SAMPLE_RATE:
+        return PROFILE_MODE
+    return None
+
+
+class ProfilingMiddleware:
+    """
+    Pure ASGI middleware choosing which requests get profiled.
+
+    Triggered by an "X-Profile: 1|sample|trace" request header or by
+    PROFILE_SAMPLE_RATE. Unprofiled requests cost one header scan (plus a
+    random() call when sampling is configured). The written file is
+    reported back in the X-Profile-File response header.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        mode = _requested_mode(scope)
+        if mode is None or not _within_budget():
+            return await self.app(scope, receive, send)
+
+        request = {"mode": mode, "file": None}
+        token = _profile_request.set(request)
+
+        async def send_with_header(message):
+            if message["type"] == "http.response.start" and request["file"]:
+                headers = list(message.get("headers", []))
+                headers.append((b"x-profile-file", request["file"].encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_header)
+        finally:
+            _profile_request.reset(token)
+
+
+class _StackSampler(threading.Thread):
+    """
+    Samples one thread's Python stack every PROFILE_SAMPLE_INTERVAL_MS and
+    aggregates collapsed stacks ("outer;inner count"), the input format of
+    flamegraph.pl, inferno and speedscope.
+    """
+
+    def __init__(self, target_thread_id: int):
+        super().__init__(name="profile-sampler", daemon=True)
+        self.target = target_thread_id
+        self.stacks = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        interval = PROFILE_SAMPLE_INTERVAL_MS / 1000.0
+        while not self._stop_event.wait(interval):
+            frame = sys._current_frames().get(self.target)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})")
+                frame = frame.f_back
+            self.stacks[";".join(reversed(stack))] += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+def _output_path(name: str, suffix: str) -> Path:
+    Path(PROFILE_DIR).mkdir(parents=True, exist_ok=True)
+    stamp = time.strftime("%Y%m%dT%H%M%S")
+    return Path(PROFILE_DIR) / f"{stamp}-{name}-{os.getpid()}-{uuid.uuid4().hex[:8]}{suffix}"
+
+
+def profiled(name: str):
+    """
+    Route decorator: profiles the endpoint body when ProfilingMiddleware
+    selected the current request.
+
+    - "trace":  deterministic cProfile of the request thread -> .prof (pstats;
+                flameprof / snakeviz / gprof2dot)
+    - "sample": statistical stack sampling -> .folded (collapsed stacks)
+    """
+
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            request = _profile_request.get()
+            if request is None:
+                return fn(*args, **kwargs)
+
+            if request["mode"] == "trace":
+                profile = cProfile.Profile()
+                try:
+                    return profile.runcall(fn, *args, **kwargs)
+                finally:
+                    path = _output_path(name, ".prof")
+                    profile.dump_stats(str(path))
+                    request["file"] = path.name
+
+            sampler = _StackSampler(threading.get_ident())
+            sampler.start()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                sampler.stop()
+                path = _output_path(name, ".folded")
+                path.write_text(
+                    "".join(f"{stack} {count}\n" for stack, count in sampler.stacks.items()),
+                    encoding="utf-8",
+                )
+                request["file"] = path.name
+
+        return wrapper
+
+    return decorator
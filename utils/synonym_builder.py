@@ -0,0 +1,109 @@
+# utils/synonym_builder.py
+#
+# Offline build step: harvest expand_with_ai() expansions for a vocabulary of
+# medical terms and compile them into a Solr-format synonym file for the
+# synonym_graph filter installed by OpenSearchIndexer.
+#
+#   python -m utils.synonym_builder                       # build only
+#   python -m utils.synonym_builder --reload              # build + refresh analyzers
+#
+# The output file must be copied to SYNONYMS_PATH (relative to the OpenSearch
+# config directory) on every node before reloading.
+
+import argparse
+import os
+import time
+from pathlib import Path
+from config.settings import (
+    OPENSEARCH_INDEX,
+    SYNONYM_VOCABULARY_FILE,
+    SYNONYMS_OUTPUT_FILE,
+)
+from utils.ai_expander import expand_with_ai
+
+
+def load_vocabulary(path) -> list[str]:
+    terms = []
+    seen = set()
+    for line in Path(path).read_text(encoding="utf-8").splitlines():
+        term = line.split("#", 1)[0].strip()
+        if term and term.lower() not in seen:
+            seen.add(term.lower())
+            terms.append(term)
+    return terms
+
+
+def synonym_rule(term: str, expansion: str) -> str | None:
+    """
+    One equivalence rule ("a, b, c") per term. Commas are the rule
+    separator in the Solr format, so they never survive inside a synonym.
+    """
+    words = []
+    seen = set()
+    for part in [term] + expansion.split(","):
+        part = " ".join(part.replace("=>", " ").lower().split())
+        if part and part not in seen:
+            seen.add(part)
+            words.append(part)
+    if len(words) < 2:
+        return None
+    return ", ".join(words)
+
+
+def build_synonyms(terms: list[str], delay: float = 0.0) -> list[str]:
+    rules = []
+    for i, term in enumerate(terms, 1):
+        rule = synonym_rule(term, expand_with_ai(term))
+        if rule:
+            rules.append(rule)
+        print(f"[{i}/{len(terms)}] {term}: {rule or 'no expansion'}")
+        if delay:
+            time.sleep(delay)
+    return rules
+
+
+def write_synonyms(rules: list[str], output) -> Path:
+    output = Path(output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    tmp = output.with_suffix(output.suffix + ".tmp")
+    tmp.write_text(
+        "# Generated by utils/synonym_builder.py - do not edit by hand\n"
+        + "".join(f"{rule}\n" for rule in rules),
+        encoding="utf-8",
+    )
+    os.replace(tmp, output)
+    return output
+
+
+def reload_search_analyzers(client, index: str):
+    """
+    Re-read updateable synonym files on every node; no reindex needed.
+    """
+    return client.transport.perform_request(
+        "POST", f"/_plugins/_refresh_search_analyzers/{index}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile AI expansions into an OpenSearch synonym file")
+    parser.add_argument("--vocabulary", default=SYNONYM_VOCABULARY_FILE)
+    parser.add_argument("--output", default=SYNONYMS_OUTPUT_FILE)
+    parser.add_argument("--delay", type=float, default=0.0, help="seconds between AI calls")
+    parser.add_argument("--reload", action="store_true", help="refresh search analyzers on the index afterwards")
+    args = parser.parse_args()
+
+    if not os.getenv("GEMINI_API_KEY"):
+        parser.error("GEMINI_API_KEY is not set; expand_with_ai would return terms unexpanded")
+
+    terms = load_vocabulary(args.vocabulary)
+    rules = build_synonyms(terms, args.delay)
+    path = write_synonyms(rules, args.output)
+    print(f"Wrote {len(rules)} synonym rules for {len(terms)} terms to {path}")
+
+    if args.reload:
+        from opensearch_client.client import get_client
+        print(reload_search_analyzers(get_client(), OPENSEARCH_INDEX))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+# utils/warmup.py
+
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from config.settings import (
+    OPENSEARCH_INDEX,
+    OPENSEARCH_POOL_SIZE,
+    ENABLE_WARMUP,
+    WARMUP_QUERIES_FILE,
+    WARMUP_RETRY_SECONDS,
+    CONTENT_HIGHLIGHT_INDEXING,
+    ENABLE_SYNONYM_ANALYZER,
+    ENABLE_VECTOR_SEARCH,
+)
+from opensearch_client.client import get_client
+from opensearch_client.indexer import (
+    OpenSearchIndexer,
+    live_highlight_profile,
+    live_synonym_search,
+    live_knn_vector,
+)
+from models.search_models import SearchInput
+from routes.search_routes import search
+
+
+readiness = {
+    "ready": not ENABLE_WARMUP,
+    "phase": "disabled" if not ENABLE_WARMUP else "pending",
+    "attempts": 0,
+    "queries_replayed": 0,
+    "duration_ms": None,
+    "error": None,
+}
+
+
+def load_warmup_queries() -> list[dict]:
+    path = Path(WARMUP_QUERIES_FILE)
+    if not path.exists():
+        return []
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def _warm_connections(client):
+    # Concurrent pings force the pool to open (and TLS-handshake) up to
+    # OPENSEARCH_POOL_SIZE connections instead of one.
+    with ThreadPoolExecutor(max_workers=OPENSEARCH_POOL_SIZE) as pool:
+        results = list(pool.map(lambda _: client.ping(), range(OPENSEARCH_POOL_SIZE)))
+    if not any(results):
+        raise RuntimeError("OpenSearch did not answer ping")
+
+
+def _replay_queries() -> int:
+    replayed = 0
+    for q in load_warmup_queries():
+        try:
+            search(SearchInput(**q))
+            replayed += 1
+        except Exception as e:
+            print(f"Warm-up query {q} failed: {e}")
+    return replayed
+
+
+def run_warmup():
+    """
+    Pre-open pooled connections, verify the index + mapping once and replay
+    representative queries. Retries until the cluster is reachable; only
+    then is the worker reported ready.
+    """
+    start = time.monotonic()
+    while True:
+        readiness["attempts"] += 1
+        try:
+            client = get_client()
+
+            readiness["phase"] = "connections"
+            _warm_connections(client)
+
+            readiness["phase"] = "index"
+            indexer = OpenSearchIndexer(client, OPENSEARCH_INDEX)
+            mismatched = indexer.verify_mapping()
+            if mismatched:
+                print(f"Warning: index {OPENSEARCH_INDEX} mapping differs for fields {mismatched}")
+            # Searches highlight according to the live mapping; this also primes its cache
+            profile = live_highlight_profile(client, OPENSEARCH_INDEX)
+            if profile != CONTENT_HIGHLIGHT_INDEXING:
+                print(
+                    f"Warning: index {OPENSEARCH_INDEX} stores content for '{profile}' highlighting, "
+                    f"CONTENT_HIGHLIGHT_INDEXING is '{CONTENT_HIGHLIGHT_INDEXING}' (applies to new indices only)"
+                )
+            if ENABLE_SYNONYM_ANALYZER and not live_synonym_search(client, OPENSEARCH_INDEX):
+                print(
+                    f"Warning: index {OPENSEARCH_INDEX} was created without the synonym_search analyzer; "
+                    f"content searches keep using AI expansion until it is reindexed"
+                )
+            if ENABLE_VECTOR_SEARCH and not live_knn_vector(client, OPENSEARCH_INDEX):
+                print(
+                    f"Warning: index {OPENSEARCH_INDEX} has no knn_vector field; "
+                    f"no vectors are stored and hybrid search is rejected until it is reindexed"
+                )
+
+            readiness["phase"] = "queries"
+            readiness["queries_replayed"] = _replay_queries()
+            break
+        except Exception as e:
+            readiness["error"] = str(e)
+            print(f"Warm-up attempt {readiness['attempts']} failed: {e}")
+            time.sleep(WARMUP_RETRY_SECONDS)
+
+    readiness.update(
+        ready=True,
+        phase="done",
+        error=None,
+        duration_ms=round((time.monotonic() - start) * 1000),
+    )
+    print(f"Warm-up finished in {readiness['duration_ms']} ms")
+
+
+def start_warmup():
+    if not ENABLE_WARMUP:
+        return
+    threading.Thread(target=run_warmup, name="warmup", daemon=True).start()
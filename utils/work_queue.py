@@ -0,0 +1,295 @@
+# utils/work_queue.py
+
+import json
+import sqlite3
+import threading
+import time
+import urllib.request
+import uuid
+from pathlib import Path
+from config.settings import (
+    WORK_QUEUE_PATH,
+    WORKER_LEASE_SECONDS,
+    WORKER_MAX_ATTEMPTS,
+)
+from opensearch_client.throttle import backoff_delay
+
+ENQUEUE_CHUNK = 1000
+
+
+class WorkQueue:
+    """
+    Durable file-level work queue for distributed indexing, backed by SQLite.
+
+    Task lifecycle:
+        pending -> leased -> done
+                          -> pending (retry with backoff) -> ... -> failed
+
+    A lease that is not completed or renewed before it expires (worker crash,
+    host lost) makes the task claimable again.
+
+    The database must live on the coordinator's local disk: WAL mode needs
+    shared memory on one host and does not work over NFS/SMB. Workers on
+    other hosts use RemoteWorkQueue, which calls the same methods through
+    the coordinator's /api/work-queue routes. A real broker can replace
+    both classes by implementing the same methods.
+    """
+
+    def __init__(self, path=WORK_QUEUE_PATH):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                job_id TEXT PRIMARY KEY,
+                folder TEXT NOT NULL,
+                index_name TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                enqueued_at REAL,
+                docs_indexed INTEGER NOT NULL DEFAULT 0,
+                enqueue_error TEXT
+            );
+            CREATE TABLE IF NOT EXISTS tasks (
+                task_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                job_id TEXT NOT NULL,
+                path TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                available_at REAL NOT NULL DEFAULT 0,
+                lease_owner TEXT,
+                lease_expires REAL,
+                error TEXT
+            );
+            CREATE INDEX IF NOT EXISTS tasks_claim ON tasks (status, available_at);
+            CREATE INDEX IF NOT EXISTS tasks_job ON tasks (job_id, status);
+            """
+        )
+
+    # ---------------------------
+    # Coordinator
+    # ---------------------------
+    def create_job(self, folder: str, index_name: str) -> str:
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (job_id, folder, index_name, created_at) VALUES (?, ?, ?, ?)",
+                (job_id, folder, index_name, time.time()),
+            )
+        return job_id
+
+    def enqueue(self, job_id: str, paths):
+        """
+        Insert file records in chunks so workers can start on the first
+        chunk while the crawl is still running.
+
+        A crawl that raises (permissions, vanished directory) still ends the
+        enqueue phase: the files found so far are queued and the error is
+        recorded on the job, so progress() can report completion.
+        """
+        chunk = []
+        error = None
+        try:
+            for path in paths:
+                chunk.append((job_id, str(path)))
+                if len(chunk) >= ENQUEUE_CHUNK:
+                    self._insert_tasks(chunk)
+                    chunk = []
+        except Exception as e:
+            error = str(e)
+            print(f"Crawl for job {job_id} failed: {e}")
+        if chunk:
+            self._insert_tasks(chunk)
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET enqueued_at = ?, enqueue_error = ? WHERE job_id = ?",
+                (time.time(), error, job_id),
+            )
+
+    def _insert_tasks(self, rows):
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.executemany("INSERT INTO tasks (job_id, path) VALUES (?, ?)", rows)
+            self._conn.execute("COMMIT")
+
+    def progress(self, job_id: str) -> dict | None:
+        with self._lock:
+            job = self._conn.execute(
+                "SELECT folder, index_name, created_at, enqueued_at, docs_indexed, enqueue_error "
+                "FROM jobs WHERE job_id = ?",
+                (job_id,),
+            ).fetchone()
+            if not job:
+                return None
+            counts = dict(self._conn.execute(
+                "SELECT status, COUNT(*) FROM tasks WHERE job_id = ? GROUP BY status", (job_id,)
+            ).fetchall())
+            workers = self._conn.execute(
+                "SELECT COUNT(DISTINCT lease_owner) FROM tasks "
+                "WHERE job_id = ? AND status = 'leased' AND lease_expires > ?",
+                (job_id, time.time()),
+            ).fetchone()[0]
+
+        folder, index_name, created_at, enqueued_at, docs_indexed, enqueue_error = job
+        total = sum(counts.values())
+        finished = counts.get("done", 0) + counts.get("failed", 0)
+        return {
+            "job_id": job_id,
+            "folder": folder,
+            "index": index_name,
+            "enqueue_complete": enqueued_at is not None,
+            "enqueue_error": enqueue_error,
+            "files_total": total,
+            "files_pending": counts.get("pending", 0),
+            "files_in_progress": counts.get("leased", 0),
+            "files_done": counts.get("done", 0),
+            "files_failed": counts.get("failed", 0),
+            "docs_indexed": docs_indexed,
+            "active_workers": workers,
+            "complete": enqueued_at is not None and finished == total,
+        }
+
+    # ---------------------------
+    # Workers
+    # ---------------------------
+    def claim(self, owner: str, limit: int):
+        """
+        Lease up to `limit` tasks from a single job.
+        Returns (job_id, index_name, folder, [(task_id, path), ...]) or None.
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Expired leases on tasks out of attempts are given up on
+                self._conn.execute(
+                    "UPDATE tasks SET status = 'failed', lease_owner = NULL, "
+                    "error = COALESCE(error, 'lease expired') "
+                    "WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?",
+                    (now, WORKER_MAX_ATTEMPTS),
+                )
+                first = self._conn.execute(
+                    "SELECT job_id FROM tasks "
+                    "WHERE (status = 'pending' AND available_at <= ?) "
+                    "OR (status = 'leased' AND lease_expires < ?) "
+                    "ORDER BY task_id LIMIT 1",
+                    (now, now),
+                ).fetchone()
+                if not first:
+                    self._conn.execute("COMMIT")
+                    return None
+
+                job_id = first[0]
+                rows = self._conn.execute(
+                    "SELECT task_id, path FROM tasks WHERE job_id = ? AND ("
+                    "(status = 'pending' AND available_at <= ?) "
+                    "OR (status = 'leased' AND lease_expires < ?)) "
+                    "ORDER BY task_id LIMIT ?",
+                    (job_id, now, now, limit),
+                ).fetchall()
+                self._conn.executemany(
+                    "UPDATE tasks SET status = 'leased', lease_owner = ?, lease_expires = ?, "
+                    "attempts = attempts + 1 WHERE task_id = ?",
+                    [(owner, now + WORKER_LEASE_SECONDS, task_id) for task_id, _ in rows],
+                )
+                index_name, folder = self._conn.execute(
+                    "SELECT index_name, folder FROM jobs WHERE job_id = ?", (job_id,)
+                ).fetchone()
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return job_id, index_name, folder, rows
+
+    def renew(self, owner: str, task_ids):
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE tasks SET lease_expires = ? WHERE task_id = ? AND lease_owner = ? AND status = 'leased'",
+                [(time.time() + WORKER_LEASE_SECONDS, task_id, owner) for task_id in task_ids],
+            )
+
+    def complete(self, owner: str, job_id: str, task_ids, docs_indexed: int):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            # Guarded by lease_owner: a worker whose lease expired and was
+            # re-claimed elsewhere must not overwrite the new owner's state
+            self._conn.executemany(
+                "UPDATE tasks SET status = 'done', lease_owner = NULL, error = NULL "
+                "WHERE task_id = ? AND lease_owner = ? AND status = 'leased'",
+                [(task_id, owner) for task_id in task_ids],
+            )
+            self._conn.execute(
+                "UPDATE jobs SET docs_indexed = docs_indexed + ? WHERE job_id = ?",
+                (docs_indexed, job_id),
+            )
+            self._conn.execute("COMMIT")
+
+    def fail(self, owner: str, task_ids, error: str):
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            for task_id in task_ids:
+                row = self._conn.execute(
+                    "SELECT attempts FROM tasks WHERE task_id = ? AND lease_owner = ? AND status = 'leased'",
+                    (task_id, owner),
+                ).fetchone()
+                if not row:
+                    continue
+                attempts = row[0]
+                status = "failed" if attempts >= WORKER_MAX_ATTEMPTS else "pending"
+                self._conn.execute(
+                    "UPDATE tasks SET status = ?, lease_owner = NULL, error = ?, available_at = ? "
+                    "WHERE task_id = ?",
+                    (status, error[:1000], now + backoff_delay(attempts), task_id),
+                )
+            self._conn.execute("COMMIT")
+
+
+class RemoteWorkQueue:
+    """
+    Worker-side view of a WorkQueue owned by the coordinator API
+    (routes/indexing_routes.py), for workers on other hosts.
+    """
+
+    def __init__(self, base_url: str, timeout: float = 30):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+
+    def _post(self, action: str, payload: dict) -> dict:
+        request = urllib.request.Request(
+            f"{self.base_url}/work-queue/{action}",
+            data=json.dumps(payload).encode(),
+            headers={"Content-Type": "application/json"},
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as res:
+            return json.loads(res.read())["data"]
+
+    def claim(self, owner: str, limit: int):
+        data = self._post("claim", {"owner": owner, "limit": limit})
+        if not data:
+            return None
+        return data["job_id"], data["index"], data["folder"], [tuple(t) for t in data["tasks"]]
+
+    def renew(self, owner: str, task_ids):
+        self._post("renew", {"owner": owner, "task_ids": list(task_ids)})
+
+    def complete(self, owner: str, job_id: str, task_ids, docs_indexed: int):
+        self._post("complete", {
+            "owner": owner, "job_id": job_id, "task_ids": list(task_ids), "docs_indexed": docs_indexed
+        })
+
+    def fail(self, owner: str, task_ids, error: str):
+        self._post("fail", {"owner": owner, "task_ids": list(task_ids), "error": error})
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_work_queue() -> WorkQueue:
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = WorkQueue()
+        return _queue